@@ -0,0 +1,61 @@
+"""
+Cold-load benchmark for the movie catalog.
+
+Compares the time to load every record with json.load on the pretty-printed
+movie_data.json, from the SQLite catalog (CatalogStore.records) and from the
+compact record snapshot (snapshot.read_snapshot).
+
+Usage:
+    python benchmarks/bench_catalog_load.py [SIZE ...]
+"""
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bench_json_import import make_record
+from catalog import CatalogStore
+from snapshot import read_snapshot, write_snapshot
+from utils import write_json_array_atomic
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+REPEAT = 3
+
+def best_of(func) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(sizes: list[int]) -> None:
+    print(f"{'records':>8} {'json MB':>8} {'snap MB':>8} {'json.load':>10} {'sqlite':>10} {'snapshot':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            json_file = Path(tmp) / f"movie_data_{size}.json"
+            snap_file = json_file.with_suffix(".snap")
+            write_json_array_atomic(json_file, (make_record(i) for i in range(size)))
+            with CatalogStore(json_file.with_suffix(".db")) as store:
+                store.import_json(json_file)
+                write_snapshot(store, snap_file)
+                generation = store.generation
+
+                def load_json():
+                    with json_file.open("r", encoding="utf-8") as f:
+                        json.load(f)
+
+                json_time = best_of(load_json)
+                sqlite_time = best_of(lambda: list(store.records()))
+                snap_time = best_of(lambda: read_snapshot(snap_file, generation))
+            mb = 1024 * 1024
+            print(f"{size:>8} {json_file.stat().st_size / mb:>8.1f} {snap_file.stat().st_size / mb:>8.1f} "
+                  f"{json_time * 1000:>8.0f}ms {sqlite_time * 1000:>8.0f}ms {snap_time * 1000:>8.0f}ms "
+                  f"{json_time / snap_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
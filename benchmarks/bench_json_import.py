@@ -0,0 +1,99 @@
+"""
+Memory benchmark for reading movie_data.json.
+
+Generates synthetic catalogs with full OMDb-sized payloads and measures the peak
+RSS of loading them with json.load versus streaming them with iter_json_array
+(counting directors as it goes) and importing them into the SQLite catalog.
+Every measurement runs in a fresh interpreter so peaks do not carry over.
+
+Usage:
+    python benchmarks/bench_json_import.py [SIZE ...]
+"""
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from utils import write_json_array_atomic
+
+DEFAULT_SIZES = [5000, 20000, 60000]
+
+PLOT = ("A long plot summary that is about as long as the ones OMDb returns for a full "
+        "record, repeated so every record carries a realistic payload size. ") * 3
+
+def make_record(i: int) -> dict:
+    year = 1950 + i % 70
+    return {
+        "file_name": f"Movie {i} {year}.mkv",
+        "imdb_id": f"tt{i:07d}",
+        "fetched_at": 1700000000 + i,
+        "data": {
+            "Title": f"Movie {i}", "Year": str(year), "Rated": "R", "Released": f"01 Jan {year}",
+            "Runtime": f"{90 + i % 60} min", "Genre": "Drama, Crime, Thriller",
+            "Director": f"Director {i % 997}", "Writer": f"Writer {i % 331}, Writer {i % 127}",
+            "Actors": f"Actor {i % 101}, Actor {i % 103}, Actor {i % 107}", "Plot": PLOT,
+            "Language": "English", "Country": "United States", "Awards": "N/A",
+            "Poster": f"https://m.media-amazon.com/images/M/{i}.jpg",
+            "Ratings": [{"Source": "Internet Movie Database", "Value": "7.5/10"}],
+            "Metascore": "70", "imdbRating": f"{5 + i % 50 / 10:.1f}", "imdbVotes": "123,456",
+            "imdbID": f"tt{i:07d}", "Type": "movie", "Response": "True",
+        },
+    }
+
+MEASURE = r"""
+import json, sys
+sys.path.insert(0, sys.argv[3])
+from collections import Counter
+mode, path = sys.argv[1], sys.argv[2]
+try:
+    import resource
+except ImportError:  # Windows: fall back to the Python heap peak
+    resource = None
+    import tracemalloc
+    tracemalloc.start()
+directors = Counter()
+if mode == "load":
+    with open(path, encoding="utf-8") as f:
+        for record in json.load(f):
+            directors[record["data"]["Director"]] += 1
+elif mode == "stream":
+    from utils import iter_json_array
+    for record in iter_json_array(path):
+        directors[record["data"]["Director"]] += 1
+else:
+    from catalog import CatalogStore
+    with CatalogStore(path + ".db") as store:
+        store.import_json(path)
+if resource:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = peak // 1024 if sys.platform != "darwin" else peak // (1024 * 1024)
+else:
+    peak = tracemalloc.get_traced_memory()[1] // (1024 * 1024)
+print(peak)
+"""
+
+def measure(mode: str, path: Path) -> int:
+    """
+    Returns the peak memory in MB (peak RSS, or the Python heap peak where RSS is not available).
+    """
+    out = subprocess.run([sys.executable, "-c", MEASURE, mode, str(path), str(ROOT)],
+                         check=True, capture_output=True, text=True).stdout
+    return int(out)
+
+def main(sizes: list[int]) -> None:
+    print("Peak memory in MB")
+    print(f"{'records':>8} {'file MB':>8} {'json.load':>10} {'streaming':>10} {'import':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = Path(tmp) / f"movie_data_{size}.json"
+            # Written lazily so this process stays small: Linux carries the parent's
+            # peak RSS over into the forked measurement process.
+            write_json_array_atomic(path, (make_record(i) for i in range(size)))
+            results = [measure(mode, path) for mode in ("load", "stream", "import")]
+            cells = " ".join(f"{peak:>10}" for peak in results)
+            print(f"{size:>8} {path.stat().st_size // (1024 * 1024):>8} {cells}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
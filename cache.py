@@ -0,0 +1,158 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_TTL_DAYS = 30
+DEFAULT_CACHE_MAX_ENTRIES = 50000
+MISS_RECHECK_BASE_DAYS = 1    # first re-check of an unresolved title, doubled after every miss
+MISS_RECHECK_MAX_DAYS = 90
+
+def normalize_title(title: str) -> str:
+    """
+    Normalizes a title for use as a cache key: lowercase, punctuation removed, single spaces.
+    """
+    return " ".join(re.sub(r"[^\w\s]", " ", title.lower()).split())
+
+def title_key(title: str, year: str) -> str:
+    """
+    Cache key for a (title, year) pair as produced by parse_movie_filename.
+    """
+    return f"t:{normalize_title(title)}|{year or ''}"
+
+def imdb_key(imdb_id: str) -> str:
+    """
+    Cache key for an IMDb ID (e.g. tt0123456).
+    """
+    return f"i:{imdb_id.lower()}"
+
+class ResponseCache:
+    """
+    Persistent OMDb response cache stored in a SQLite file.
+    Entries expire ttl_days after they were fetched; once more than max_entries are stored
+    the least recently used ones are evicted. Safe to share between fetch worker threads.
+    Lookups that found nothing are kept in a separate negative cache and only retried
+    after an interval that doubles with every further miss.
+    Hits only update their last use time in memory; the times are written with the next
+    store or on close, so cache hits never wait for the disk.
+    """
+    def __init__(self, path: Path, ttl_days: float = DEFAULT_CACHE_TTL_DAYS,
+                 max_entries: int = DEFAULT_CACHE_MAX_ENTRIES):
+        self.path = Path(path)
+        self.ttl = ttl_days * 86400
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.used = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+                "fetched_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS misses ("
+                "key TEXT PRIMARY KEY, attempts INTEGER NOT NULL, next_check REAL NOT NULL)"
+            )
+        self.size = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> dict | None:
+        """
+        Returns the cached payload for key, or None if it is missing or older than the TTL.
+        """
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT payload, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, fetched_at = row
+            if self.ttl > 0 and now - fetched_at > self.ttl:
+                return None
+            self.used[key] = now
+        return json.loads(payload)
+
+    def put(self, key: str, payload: dict) -> None:
+        """
+        Stores payload under key with the current time as its fetch time.
+        """
+        now = time.time()
+        with self.lock, self.conn:
+            self._flush_used()
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO responses (key, payload, fetched_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(payload, ensure_ascii=False), now, now),
+            )
+            if cursor.rowcount:
+                self.size += 1
+            else:
+                self.conn.execute(
+                    "UPDATE responses SET payload = ?, fetched_at = ?, last_used = ? WHERE key = ?",
+                    (json.dumps(payload, ensure_ascii=False), now, now, key),
+                )
+            if self.size > self.max_entries:
+                self._evict()
+
+    def is_known_miss(self, key: str) -> bool:
+        """
+        Checks whether key is a recorded miss that is not due for a re-check yet.
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT next_check FROM misses WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def record_miss(self, key: str) -> float:
+        """
+        Records that key could not be resolved and schedules its next re-check.
+
+        Returns:
+        float: Days until the next re-check.
+        """
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT attempts FROM misses WHERE key = ?", (key,)).fetchone()
+            attempts = row[0] + 1 if row else 1
+            days = min(MISS_RECHECK_MAX_DAYS, MISS_RECHECK_BASE_DAYS * 2 ** (attempts - 1))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO misses (key, attempts, next_check) VALUES (?, ?, ?)",
+                (key, attempts, time.time() + days * 86400),
+            )
+        return days
+
+    def clear_miss(self, key: str) -> None:
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM misses WHERE key = ?", (key,))
+
+    def _flush_used(self) -> None:
+        # Writes the last use times of the hits since the last flush, in the caller's transaction
+        if self.used:
+            self.conn.executemany("UPDATE responses SET last_used = ? WHERE key = ?",
+                                  [(used, key) for key, used in self.used.items()])
+            self.used.clear()
+
+    def _evict(self) -> None:
+        # Drop a little more than needed so we don't evict on every single put.
+        excess = self.size - int(self.max_entries * 0.9)
+        self.conn.execute(
+            "DELETE FROM responses WHERE key IN "
+            "(SELECT key FROM responses ORDER BY last_used LIMIT ?)", (excess,)
+        )
+        self.size = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        with self.lock:
+            with self.conn:
+                self._flush_used()
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,444 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterator
+from utils import extract_year, iter_json_array, write_json_array_atomic
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+    file_name TEXT PRIMARY KEY,
+    imdb_id TEXT,
+    title TEXT,
+    director TEXT,
+    year INTEGER,
+    decade INTEGER,
+    rating REAL,
+    genre TEXT,
+    genres TEXT,
+    actors TEXT,
+    countries TEXT,
+    languages TEXT,
+    runtime INTEGER,
+    fetched_at INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS movies_imdb_id ON movies (imdb_id);
+CREATE INDEX IF NOT EXISTS movies_director ON movies (director);
+CREATE INDEX IF NOT EXISTS movies_year ON movies (year);
+CREATE INDEX IF NOT EXISTS movies_decade ON movies (decade);
+CREATE INDEX IF NOT EXISTS movies_rating ON movies (rating);
+CREATE INDEX IF NOT EXISTS movies_genre ON movies (genre);
+CREATE TABLE IF NOT EXISTS movie_genres (
+    file_name TEXT NOT NULL REFERENCES movies (file_name) ON DELETE CASCADE,
+    genre TEXT NOT NULL,
+    PRIMARY KEY (file_name, genre)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS movie_genres_genre ON movie_genres (genre);
+CREATE TABLE IF NOT EXISTS movie_details (
+    file_name TEXT PRIMARY KEY REFERENCES movies (file_name) ON DELETE CASCADE,
+    data TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+LAYOUT_VERSION = "3"  # bumped whenever stored rows have to be re-derived
+# Columns added after the first release, with their types, for migrating older catalogs
+ADDED_COLUMNS = {"genres": "TEXT", "actors": "TEXT", "countries": "TEXT", "languages": "TEXT", "runtime": "INTEGER"}
+
+# OMDb fields kept in the hot movies table. Everything else goes to movie_details,
+# which is only read when a full record is asked for.
+HOT_FIELDS = ("Title", "Year", "Director", "Genre", "Actors", "Country", "Language", "Runtime",
+              "imdbRating", "imdbID", "Type", "Source")
+FIELD_PROFILES = {
+    "minimal": HOT_FIELDS,  # only what stats and categories need; other fields are dropped
+    "full": None,           # keep the whole OMDb response
+}
+DEFAULT_PROFILE = "full"
+
+def catalog_path(json_file: Path) -> Path:
+    """
+    Path of the SQLite catalog that belongs to the configured JSON_FILE.
+    """
+    return Path(json_file).with_suffix(".db")
+
+def catalog_exists(json_file: Path) -> bool:
+    """
+    Checks whether there is any movie data yet, either in the catalog or in a legacy JSON file.
+    """
+    return catalog_path(json_file).exists() or Path(json_file).exists()
+
+def _split(field: str) -> tuple:
+    """
+    Splits an OMDb list field ("Drama, Crime") into a tuple, dropping "N/A".
+    """
+    return tuple(value.strip() for value in field.split(",") if value.strip() and value.strip() != "N/A")
+
+def _join(values: tuple) -> str | None:
+    return ", ".join(values) or None
+
+class MovieRecord:
+    """
+    A catalog entry with its OMDb fields parsed once into typed values.
+    Consumers that only group or sort movies use these instead of the raw OMDb data.
+    Missing values are None, or an empty tuple for the list fields.
+    """
+    __slots__ = ("file_name", "imdb_id", "title", "director", "year", "decade", "rating", "genres", "fetched_at",
+                 "actors", "countries", "languages", "runtime")
+
+    def __init__(self, file_name: str, imdb_id: str | None = None, title: str | None = None,
+                 director: str | None = None, year: int | None = None, rating: float | None = None,
+                 genres: tuple = (), fetched_at: int | None = None, actors: tuple = (),
+                 countries: tuple = (), languages: tuple = (), runtime: int | None = None):
+        self.file_name = file_name
+        self.imdb_id = imdb_id
+        self.title = title
+        self.director = director
+        self.year = year
+        self.decade = (year // 10) * 10 if year else None
+        self.rating = rating
+        self.genres = genres
+        self.fetched_at = fetched_at
+        self.actors = actors
+        self.countries = countries
+        self.languages = languages
+        self.runtime = runtime
+
+    @classmethod
+    def from_record(cls, record: dict) -> "MovieRecord":
+        """
+        Parses a catalog record ({"file_name", "imdb_id", "fetched_at", "data"}) as stored
+        in movie_data.json. The data may also be a JSON string.
+        """
+        data = record.get("data", {})
+        if isinstance(data, str):
+            try:
+                data = json.loads(data)
+            except json.JSONDecodeError:
+                data = {}
+        # Primary director (first in the list if multiple)
+        director_field = data.get("Director", "")
+        director = director_field.split(",")[0].strip() if director_field and director_field != "N/A" else None
+        try:
+            rating = float(data.get("imdbRating", ""))
+        except ValueError:
+            rating = None
+        runtime = data.get("Runtime", "").split(" ")[0]
+        return cls(
+            record.get("file_name", ""),
+            record.get("imdb_id") or data.get("imdbID"),
+            data.get("Title", "").strip() or None,
+            director,
+            extract_year(data.get("Year", "")),
+            rating,
+            _split(data.get("Genre", "")),
+            record.get("fetched_at"),
+            _split(data.get("Actors", "")),
+            _split(data.get("Country", "")),
+            _split(data.get("Language", "")),
+            int(runtime) if runtime.isdigit() else None,
+        )
+
+    def __repr__(self) -> str:
+        return f"MovieRecord({self.file_name!r}, {self.title!r}, {self.year!r})"
+
+def _columns(record: dict) -> tuple:
+    """
+    Derives the indexed columns of a catalog record from its OMDb data.
+    Returns the column values, the genres and the parsed OMDb data.
+    """
+    data = record.get("data", {})
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except json.JSONDecodeError:
+            data = {}
+    movie = MovieRecord.from_record({**record, "data": data})
+    return (
+        movie.file_name,
+        movie.imdb_id,
+        movie.title,
+        movie.director,
+        movie.year,
+        movie.decade,
+        movie.rating,
+        movie.genres[0] if movie.genres else None,
+        _join(movie.genres),
+        _join(movie.actors),
+        _join(movie.countries),
+        _join(movie.languages),
+        movie.runtime,
+        movie.fetched_at,
+    ), movie.genres, data
+
+class CatalogStore:
+    """
+    The movie catalog, stored in SQLite with indexed columns for the fields the app
+    groups and filters by. Every write is a transaction, so a single new record costs
+    one row instead of rewriting the whole catalog, and a crash never loses committed
+    records. Safe to share between threads.
+
+    Only the HOT_FIELDS of the OMDb data are stored with a movie; the remaining fields
+    go to a separate cold table (or are dropped with the "minimal" profile).
+    With read_only, an existing catalog is opened for reading only and is not migrated.
+    """
+    def __init__(self, path: Path, profile: str = DEFAULT_PROFILE, read_only: bool = False):
+        if profile not in FIELD_PROFILES:
+            raise ValueError(f"Unknown field profile: {profile}")
+        self.path = Path(path)
+        self.profile = profile
+        self.lock = threading.RLock()
+        if read_only:
+            # Without a write-ahead log (no open writer), immutable also keeps SQLite from
+            # creating its -wal and -shm files next to the catalog
+            wal = self.path.with_name(self.path.name + "-wal")
+            mode = "mode=ro" if wal.exists() else "immutable=1"
+            self.conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?{mode}", uri=True, check_same_thread=False)
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        # Catalogs written by an older version: add missing columns and re-derive every row,
+        # which also moves the cold OMDb fields out of the movies table.
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(movies)")}
+        if self.get_meta("layout") == LAYOUT_VERSION and columns.issuperset(ADDED_COLUMNS):
+            return
+        with self.lock, self.conn:
+            for column, column_type in ADDED_COLUMNS.items():
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE movies ADD COLUMN {column} {column_type}")
+            for row in self.conn.execute(
+                    "SELECT m.file_name, m.imdb_id, m.fetched_at, m.data, d.data FROM movies m "
+                    "LEFT JOIN movie_details d ON d.file_name = m.file_name").fetchall():
+                self._upsert(self._record(row))
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('layout', ?)", (LAYOUT_VERSION,))
+            self._bump_generation()
+
+    def _upsert(self, record: dict) -> None:
+        row, genres, data = _columns(record)
+        hot = {key: value for key, value in data.items() if key in HOT_FIELDS}
+        cold = {} if self.profile == "minimal" else {key: value for key, value in data.items() if key not in HOT_FIELDS}
+        row += (json.dumps(hot, ensure_ascii=False),)
+        self.conn.execute(
+            "INSERT INTO movies (file_name, imdb_id, title, director, year, decade, rating, genre, genres, "
+            "actors, countries, languages, runtime, fetched_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (file_name) DO UPDATE SET "
+            "imdb_id = excluded.imdb_id, title = excluded.title, director = excluded.director, "
+            "year = excluded.year, decade = excluded.decade, rating = excluded.rating, "
+            "genre = excluded.genre, genres = excluded.genres, actors = excluded.actors, "
+            "countries = excluded.countries, languages = excluded.languages, runtime = excluded.runtime, "
+            "fetched_at = excluded.fetched_at, data = excluded.data",
+            row,
+        )
+        self.conn.execute("DELETE FROM movie_genres WHERE file_name = ?", (row[0],))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO movie_genres (file_name, genre) VALUES (?, ?)",
+            ((row[0], genre) for genre in genres),
+        )
+        if cold:
+            self.conn.execute("INSERT OR REPLACE INTO movie_details (file_name, data) VALUES (?, ?)",
+                              (row[0], json.dumps(cold, ensure_ascii=False)))
+        else:
+            self.conn.execute("DELETE FROM movie_details WHERE file_name = ?", (row[0],))
+
+    def _bump_generation(self) -> None:
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('generation', '1') "
+            "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+
+    @property
+    def generation(self) -> int:
+        """
+        A counter that changes with every write, for caches derived from the catalog.
+        """
+        return int(self.get_meta("generation") or 0)
+
+    def upsert(self, record: dict) -> None:
+        """
+        Inserts record, or replaces the record with the same file name, in one transaction.
+        """
+        with self.lock, self.conn:
+            self._upsert(record)
+            self._bump_generation()
+
+    def upsert_many(self, records) -> int:
+        """
+        Upserts all records in a single transaction.
+
+        Returns:
+        int: The number of records written.
+        """
+        count = 0
+        with self.lock, self.conn:
+            for record in records:
+                self._upsert(record)
+                count += 1
+            self._bump_generation()
+        return count
+
+    def get(self, file_name: str, details: bool = True) -> dict | None:
+        """
+        Returns the record for file_name, with the full OMDb data unless details is False.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT m.file_name, m.imdb_id, m.fetched_at, m.data, " + ("d.data" if details else "NULL") +
+                " FROM movies m LEFT JOIN movie_details d ON d.file_name = m.file_name WHERE m.file_name = ?",
+                (file_name,)
+            ).fetchone()
+        return self._record(row) if row else None
+
+    def __contains__(self, file_name: str) -> bool:
+        with self.lock:
+            return self.conn.execute(
+                "SELECT 1 FROM movies WHERE file_name = ?", (file_name,)
+            ).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM movies").fetchone()[0]
+
+    def __iter__(self) -> Iterator[dict]:
+        """
+        Yields every full record in insertion order, reading rows from the cursor as it goes.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT m.file_name, m.imdb_id, m.fetched_at, m.data, d.data FROM movies m "
+                       "LEFT JOIN movie_details d ON d.file_name = m.file_name ORDER BY m.rowid")
+        for row in cursor:
+            yield self._record(row)
+
+    def records(self) -> Iterator[MovieRecord]:
+        """
+        Yields every record as a MovieRecord in insertion order. The typed fields are read
+        from the indexed columns, so the stored OMDb data is not parsed again.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT file_name, imdb_id, title, director, year, rating, genres, fetched_at, "
+                       "actors, countries, languages, runtime FROM movies ORDER BY rowid")
+        for (file_name, imdb_id, title, director, year, rating, genres, fetched_at,
+             actors, countries, languages, runtime) in cursor:
+            yield MovieRecord(file_name, imdb_id, title, director, year, rating, _split(genres or ""),
+                              fetched_at, _split(actors or ""), _split(countries or ""),
+                              _split(languages or ""), runtime)
+
+    @staticmethod
+    def _record(row) -> dict:
+        file_name, imdb_id, fetched_at, data, details = row
+        data = json.loads(data)
+        if details:
+            data.update(json.loads(details))
+        return {"file_name": file_name, "imdb_id": imdb_id, "fetched_at": fetched_at, "data": data}
+
+    def query(self, sql: str, params: tuple = ()) -> list:
+        """
+        Runs a read-only query against the catalog tables and returns all rows.
+        """
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def get_meta(self, key: str) -> str | None:
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _record_json_mtime(self, json_file: Path) -> None:
+        # Only the catalog's own JSON file is compared by open_catalog; other files
+        # imported or exported must not make it look up to date (or stale)
+        if catalog_path(json_file).resolve() == self.path.resolve():
+            self.set_meta("json_mtime", str(json_file.stat().st_mtime))
+
+    def import_json(self, json_file: Path) -> int:
+        """
+        Imports a movie_data.json file, upserting its records by file name.
+        Later duplicates of a file name replace earlier ones. The file is streamed one
+        record at a time, so memory use does not grow with the size of the catalog.
+
+        Returns:
+        int: The number of records read.
+        """
+        json_file = Path(json_file)
+        count = self.upsert_many(iter_json_array(json_file))
+        self._record_json_mtime(json_file)
+        return count
+
+    def export_json(self, json_file: Path) -> int:
+        """
+        Writes the catalog in the movie_data.json format (atomically), streaming the
+        records from the database into the file.
+
+        Returns:
+        int: The number of records written.
+        """
+        json_file = Path(json_file)
+        with self.lock:
+            count = write_json_array_atomic(json_file, self)
+        self._record_json_mtime(json_file)
+        return count
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_catalog(json_file: Path, profile: str = DEFAULT_PROFILE) -> CatalogStore:
+    """
+    Opens the catalog that belongs to json_file. If json_file was changed since it was
+    last imported or exported (or the catalog is new), it is imported first, so existing
+    movie_data.json files are migrated automatically. profile selects which OMDb fields
+    are kept when records are written (see FIELD_PROFILES).
+    """
+    json_file = Path(json_file)
+    store = CatalogStore(catalog_path(json_file), profile)
+    if json_file.exists():
+        imported = store.get_meta("json_mtime")
+        if imported is None or float(imported) != json_file.stat().st_mtime:
+            try:
+                count = store.import_json(json_file)
+                print(f"Imported {count} records from {json_file.name} into the catalog")
+            except json.JSONDecodeError:
+                pass
+    return store
+
+def read_catalog(json_file: Path) -> list[MovieRecord]:
+    """
+    Reads every record as open_catalog(json_file) would have them, in insertion order,
+    without writing anything: the catalog is opened read-only, and a JSON_FILE that
+    open_catalog would import is applied to the records in memory only.
+    """
+    json_file = Path(json_file)
+    records = {}
+    imported = None
+    if catalog_path(json_file).exists():
+        with CatalogStore(catalog_path(json_file), read_only=True) as store:
+            imported = store.get_meta("json_mtime")
+            if store.get_meta("layout") == LAYOUT_VERSION:
+                records = {record.file_name: record for record in store.records()}
+            else:
+                # Not migrated yet: parse the stored OMDb data instead of the derived columns
+                for file_name, imdb_id, fetched_at, data in store.query(
+                        "SELECT file_name, imdb_id, fetched_at, data FROM movies ORDER BY rowid"):
+                    records[file_name] = MovieRecord.from_record(
+                        {"file_name": file_name, "imdb_id": imdb_id, "fetched_at": fetched_at, "data": data})
+    if json_file.exists() and (imported is None or float(imported) != json_file.stat().st_mtime):
+        try:
+            imports = [MovieRecord.from_record(record) for record in iter_json_array(json_file)]
+        except json.JSONDecodeError:
+            imports = []
+        records.update((record.file_name, record) for record in imports)
+    return list(records.values())
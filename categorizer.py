@@ -1,182 +1,196 @@
 import json
-import platform
-import shutil
 from pathlib import Path
-from utils import sanitize_folder_name, extract_year
+from utils import sanitize_folder_name, write_json_atomic
+from scanner import index_video_files
+from snapshot import load_records
+from dimensions import category_folders, get_dimensions, group_movies, DEFAULT_SHARDING
+from treesync import SyncOp, plan_sync, apply_sync, apply_staged
+from playlists import build_manifests, write_manifests
+from linkwriter import LinkWriter, get_link_creator, link_name, resolve_strategy, DEFAULT_LINK_JOBS, DEFAULT_LINK_STRATEGY
+from catalog import DEFAULT_PROFILE
 from colorama import Fore
-from collections import Counter
+from typing import Iterable
 
-def create_shortcut(target: Path, shortcut_path: Path) -> None:
-    """
-    Creates a shortcut to the target file at shortcut_path.
-    On Windows, uses win32com; on other OS, creates a symbolic link.
-    """
-    if platform.system() == "Windows":
-        import win32com.client
-        shell = win32com.client.Dispatch("WScript.Shell")
-        shortcut = shell.CreateShortCut(str(shortcut_path))
-        shortcut.Targetpath = str(target)
-        shortcut.WorkingDirectory = str(target.parent)
-        shortcut.save()
-    else:
-        shortcut_path.symlink_to(target)
-
-def find_movie_file(file_name: str, search_folder: Path) -> Path | None:
-    """
-    Searches for the movie file with file_name in search_folder and its subdirectories.
-    """
-    for file in search_folder.rglob(file_name):
-        if file.is_file():
-            return file
-    return None
+RANKING_FILE = "ranking.json"
+# links: a folder tree with a link per movie; playlists: an M3U8 playlist per category value
+CATEGORY_OUTPUTS = ("links", "playlists")
+DEFAULT_CATEGORY_OUTPUT = "links"
 
-def create_shortcuts_and_categorize(source_folder: Path, json_file: Path, dest_base: Path, need_director: bool, need_imdb: bool, need_decade: bool) -> None:
+def create_shortcuts_and_categorize(source_folder: Path, json_file: Path, dest_base: Path, need_director: bool, need_imdb: bool, need_decade: bool,
+                                    jobs: int = DEFAULT_LINK_JOBS, strategy: str = DEFAULT_LINK_STRATEGY,
+                                    extra_categories: Iterable[str] = (), staged: bool = False,
+                                    sharding: str = DEFAULT_SHARDING, stable_names: bool = False,
+                                    output: str = DEFAULT_CATEGORY_OUTPUT, profile: str = DEFAULT_PROFILE) -> None:
     """
-    Creates shortcuts for movies and categorizes them by director, IMDb rating, and decade.
-    Directors are sorted by movie count and folder names include ranking numbers.
+    Creates shortcuts for movies and categorizes them by director, IMDb rating, and decade,
+    plus any extra_categories (dimension names, see dimensions.DIMENSIONS: genre, actor,
+    country, language, runtime). All categories are grouped in one pass over the catalog.
+    Directors and actors are sorted by movie count and folder names include ranking numbers.
+    Movie files are looked up once in an index of source_folder built with a single scan; the
+    directory listings are kept in file_index.json next to json_file for the next run.
+    Shortcuts are written by up to jobs parallel workers, as .lnk files or file system
+    links depending on strategy (see linkwriter.LINK_STRATEGIES).
+    With staged, changed category folders are rebuilt next to the live ones and swapped in
+    when complete, so media players browsing dest_base never see a half-built tree.
+    sharding and stable_names set the folder layout of ranked categories (see
+    dimensions.group_movies); with stable_names the ranking is written to ranking.json in
+    the category folder instead.
+    With output "playlists", no links are created: each category value gets an M3U8
+    playlist and each category an index.json, and only changed files are rewritten.
+    profile is the field profile of records imported from a changed json_file.
     """
+    if output not in CATEGORY_OUTPUTS:
+        raise ValueError(f"Unknown category output: {output} (choose from {', '.join(CATEGORY_OUTPUTS)})")
+    strategy = resolve_strategy(strategy)
+    dimensions = _dimensions(need_director, need_imdb, need_decade, extra_categories)
     dest_base.mkdir(parents=True, exist_ok=True)
-    with json_file.open("r", encoding="utf-8") as f:
-        movies_data = json.load(f)
-
-    director_groups = {}
-    rating_groups = {}
-    decade_groups = {}
-    director_movie_count = Counter()
+    groups, paths = _group_catalog(source_folder, json_file, dest_base, dimensions, sharding, stable_names,
+                                   profile=profile)
 
-    # First pass: count movies per director
-    for movie in movies_data:
-        data = movie.get("data", {})
-        if isinstance(data, str):
-            try:
-                data = json.loads(data)
-            except json.JSONDecodeError:
-                continue
+    if output == "playlists":
+        manifests = build_manifests(dest_base, dimensions, groups, paths)
+        written, removed, unchanged = write_manifests(dest_base, [dimension.folder for dimension in dimensions],
+                                                      manifests)
+        print(Fore.GREEN + f"Playlists synced: {written} written, {removed} removed, {unchanged} unchanged")
+        return
 
-        title = data.get("Title", "").strip()
-        if not title:
-            continue
+    desired, labels = _desired_tree(dimensions, groups, paths, strategy)
+    # Only touch what differs from the tree already on disk
+    ops = plan_sync(dest_base, [dimension.folder for dimension in dimensions], desired, strategy)
+    apply_categorize(dest_base, ops, desired, jobs, strategy, staged, labels,
+                     _rankings(dimensions, groups, stable_names))
 
-        # Extract director (first director if multiple)
-        director_field = data.get("Director", "")
-        director = director_field.split(",")[0].strip() if director_field and director_field != "N/A" else "Unknown"
-        
-        # Count movies per director
-        director_movie_count[director] += 1
+def _dimensions(need_director: bool, need_imdb: bool, need_decade: bool, extra_categories: Iterable[str]) -> list:
+    names = [name for name, needed in (("director", need_director), ("imdb", need_imdb), ("decade", need_decade))
+             if needed]
+    return get_dimensions([*names, *extra_categories])
 
-    # Second pass: group movies and create shortcuts
-    for movie in movies_data:
-        file_name = movie.get("file_name", "")
-        data = movie.get("data", {})
-        if isinstance(data, str):
-            try:
-                data = json.loads(data)
-            except json.JSONDecodeError:
-                continue
+def _group_catalog(source_folder: Path, json_file: Path, dest_base: Path, dimensions: list, sharding: str,
+                   stable_names: bool, read_only: bool = False,
+                   profile: str = DEFAULT_PROFILE) -> tuple[dict, dict[str, Path | None]]:
+    # With read_only nothing is written: no file index cache, snapshot or catalog import
+    # Absolute paths, so link targets compare equal to what is read back from the tree and
+    # plain symlinks do not resolve against the link's own folder
+    source_folder = Path(source_folder).resolve()
+    file_index = index_video_files(source_folder, json_file.with_name("file_index.json"), category_folders(dest_base),
+                                   update_cache=not read_only)
+    duplicates = file_index.duplicates()
 
-        title = data.get("Title", "").strip()
-        if not title:
+    # Resolve every movie's file once, then group by all dimensions in a single pass
+    paths = {}
+    movies = []
+    for movie in load_records(json_file, read_only=read_only, profile=profile):
+        if not movie.title:
             continue
+        if movie.file_name in duplicates:
+            print(Fore.YELLOW + f"Duplicate file name '{movie.file_name}', using the first of: "
+                  + ", ".join(duplicates[movie.file_name]))
+        orig_path = file_index.find(movie.file_name)
+        if not orig_path:
+            print(Fore.RED + f"Original file for '{movie.title}' not found.")
+        paths[movie.file_name] = orig_path
+        movies.append(movie)
+    return group_movies(movies, dimensions, sharding, stable_names), paths
+
+def _desired_tree(dimensions: list, groups: dict, paths: dict[str, Path | None],
+                  strategy: str) -> tuple[dict[Path, Path], dict[Path, tuple[str, str]]]:
+    # Link path (relative to dest_base) -> movie file, and the category and title of every link
+    desired = {}
+    labels = {}
+    for dimension in dimensions:
+        for group, members in groups[dimension.name].items():
+            for movie in members:
+                orig_path = paths[movie.file_name]
+                if not orig_path:
+                    continue
+                safe_title = sanitize_folder_name(movie.title)
+                shortcut_path = Path(dimension.folder, group, safe_title, link_name(safe_title, orig_path, strategy))
+                if desired.setdefault(shortcut_path, orig_path) == orig_path:
+                    labels[shortcut_path] = (dimension.label, movie.title)
+    return desired, labels
 
-        # Extract director (first director if multiple)
-        director_field = data.get("Director", "")
-        director = director_field.split(",")[0].strip() if director_field and director_field != "N/A" else "Unknown"
+def plan_categorize(source_folder: Path, json_file: Path, dest_base: Path, need_director: bool, need_imdb: bool,
+                    need_decade: bool, strategy: str = DEFAULT_LINK_STRATEGY, extra_categories: Iterable[str] = (),
+                    sharding: str = DEFAULT_SHARDING,
+                    stable_names: bool = False) -> tuple[list[SyncOp], dict[Path, Path], dict[str, list | None]]:
+    """
+    Works out the changes create_shortcuts_and_categorize would make to the category
+    tree, without writing anything to disk. Only the link output can be planned.
 
-        # Extract IMDb rating
-        try:
-            imdb_rating = float(data.get("imdbRating", "0.0"))
-        except ValueError:
-            imdb_rating = 0.0
+    Returns:
+    tuple: (the changes from treesync.plan_sync, the desired tree: link path relative to
+    dest_base -> movie file, the rankings to write as in apply_categorize)
+    """
+    strategy = resolve_strategy(strategy)
+    dimensions = _dimensions(need_director, need_imdb, need_decade, extra_categories)
+    groups, paths = _group_catalog(source_folder, json_file, dest_base, dimensions, sharding, stable_names,
+                                   read_only=True)
+    desired, _ = _desired_tree(dimensions, groups, paths, strategy)
+    ops = plan_sync(dest_base, [dimension.folder for dimension in dimensions], desired, strategy)
+    return ops, desired, _rankings(dimensions, groups, stable_names)
 
-        # Extract year and calculate decade
-        year_str = data.get("Year", "")
-        year_int = extract_year(year_str) if year_str else None
-        decade = f"{(year_int // 10) * 10}s" if year_int else "Unknown"
-        
-        if need_director:
-            director_groups.setdefault(director, []).append({
-                "file_name": file_name,
-                "title": title
-            })
-        if need_imdb:
-            rating_key = f"{imdb_rating:.1f}"
-            rating_groups.setdefault(rating_key, []).append({
-                "file_name": file_name,
-                "title": title
-            })
-        if need_decade:
-            decade_groups.setdefault(decade, []).append({
-                "file_name": file_name,
-                "title": title
-            })
+def apply_categorize(dest_base: Path, ops: list[SyncOp], desired: dict[Path, Path], jobs: int = DEFAULT_LINK_JOBS,
+                     strategy: str = DEFAULT_LINK_STRATEGY, staged: bool = False,
+                     labels: dict[Path, tuple[str, str]] | None = None,
+                     rankings: dict[str, list | None] | None = None) -> list[SyncOp]:
+    """
+    Applies changes from plan_categorize (or treesync.plan_sync) to the category tree and
+    prints what was done. rankings maps ranked category folders to the ranking to write to
+    their ranking.json, or to None where the file has to go (see plan_categorize).
 
-    # Categorize by Director with ranking
-    if need_director:
-        director_folder_base = dest_base / "ByDirector"
-        director_folder_base.mkdir(exist_ok=True)
-        
-        # If the directory already exists, remove it and recreate
-        if director_folder_base.exists():
-            shutil.rmtree(director_folder_base)
-            director_folder_base.mkdir(exist_ok=True)
-        
-        # Create ranked director folders
-        for rank, (director, _) in enumerate(director_movie_count.most_common(), 1):
-            movies = director_groups.get(director, [])
-            safe_director = sanitize_folder_name(director)
-            # Create folder with rank prefix
-            ranked_director_name = f"{rank}. {safe_director}"
-            director_folder = director_folder_base / ranked_director_name
-            director_folder.mkdir(exist_ok=True)
-            
-            for movie in movies:
-                safe_title = sanitize_folder_name(movie["title"])
-                movie_folder = director_folder / safe_title
-                movie_folder.mkdir(exist_ok=True)
-                orig_path = find_movie_file(movie["file_name"], source_folder)
-                if orig_path:
-                    shortcut_path = movie_folder / f"{safe_title}.lnk"
-                    create_shortcut(orig_path, shortcut_path)
-                    print(Fore.GREEN + f"Director - Shortcut for '{movie['title']}' created at {shortcut_path}")
-                else:
-                    print(Fore.RED + f"Director - Original file for '{movie['title']}' not found.")
+    Returns:
+    list[SyncOp]: The changes that were applied.
+    """
+    strategy = resolve_strategy(strategy)
+    dest_base.mkdir(parents=True, exist_ok=True)
+    with LinkWriter(get_link_creator(strategy), jobs) as writer:
+        if staged:
+            applied = apply_staged(dest_base, ops, desired, writer, strategy)
+        else:
+            applied = apply_sync(dest_base, ops, writer, strategy)
+    for op in applied:
+        if op.kind in ("create", "retarget"):
+            action = "created" if op.kind == "create" else "updated"
+            if labels and op.path in labels:
+                label, title = labels[op.path]
+                print(Fore.GREEN + f"{label} - Shortcut for '{title}' {action} at {dest_base / op.path}")
+            else:
+                print(Fore.GREEN + f"Shortcut {action} at {dest_base / op.path}")
+    removed = sum(1 for op in applied if op.kind == "remove")
+    unchanged = len(desired) - sum(1 for op in ops if op.kind in ("create", "retarget"))
+    print(Fore.GREEN + f"Categories synced: {len(applied)} changes, {removed} shortcuts removed, {unchanged} unchanged")
+    for line in writer.report():
+        print(line)
+    for folder, ranking in (rankings or {}).items():
+        if ranking is None:
+            (dest_base / folder / RANKING_FILE).unlink(missing_ok=True)
+        else:
+            write_ranking(dest_base / folder, ranking)
+    return applied
 
-    # Categorize by IMDb Rating
-    if need_imdb:
-        rating_folder_base = dest_base / "ByIMDBRating"
-        rating_folder_base.mkdir(exist_ok=True)
-        for rating, movies in rating_groups.items():
-            safe_rating = sanitize_folder_name(rating)
-            rating_folder = rating_folder_base / safe_rating
-            rating_folder.mkdir(exist_ok=True)
-            for movie in movies:
-                safe_title = sanitize_folder_name(movie["title"])
-                movie_folder = rating_folder / safe_title
-                movie_folder.mkdir(exist_ok=True)
-                orig_path = find_movie_file(movie["file_name"], source_folder)
-                if orig_path:
-                    shortcut_path = movie_folder / f"{safe_title}.lnk"
-                    create_shortcut(orig_path, shortcut_path)
-                    print(Fore.GREEN + f"IMDb - Shortcut for '{movie['title']}' created at {shortcut_path}")
-                else:
-                    print(Fore.RED + f"IMDb - Original file for '{movie['title']}' not found.")
+def _rankings(dimensions: list, groups: dict, stable_names: bool) -> dict[str, list | None]:
+    # Ranking of every ranked category: kept in ranking.json with stable names, else in the folder names
+    rankings = {}
+    for dimension in dimensions:
+        if not dimension.ranked:
+            continue
+        rankings[dimension.folder] = None
+        if stable_names:
+            rankings[dimension.folder] = [
+                {"rank": rank, "name": Path(group).name, "folder": Path(group).as_posix(), "movies": len(members)}
+                for rank, (group, members) in enumerate(groups[dimension.name].items(), 1)]
+    return rankings
 
-    # Categorize by Decade
-    if need_decade:
-        decade_folder_base = dest_base / "ByDecade"
-        decade_folder_base.mkdir(exist_ok=True)
-        for decade, movies in decade_groups.items():
-            safe_decade = sanitize_folder_name(decade)
-            decade_folder = decade_folder_base / safe_decade
-            decade_folder.mkdir(exist_ok=True)
-            for movie in movies:
-                safe_title = sanitize_folder_name(movie["title"])
-                movie_folder = decade_folder / safe_title
-                movie_folder.mkdir(exist_ok=True)
-                orig_path = find_movie_file(movie["file_name"], source_folder)
-                if orig_path:
-                    shortcut_path = movie_folder / f"{safe_title}.lnk"
-                    create_shortcut(orig_path, shortcut_path)
-                    print(Fore.GREEN + f"Decade - Shortcut for '{movie['title']}' created at {shortcut_path}")
-                else:
-                    print(Fore.RED + f"Decade - Original file for '{movie['title']}' not found.")
\ No newline at end of file
+def write_ranking(folder: Path, ranking: list[dict]) -> None:
+    """
+    Writes the ranking of a ranked category to ranking.json in its folder. The file is
+    only rewritten when the ranking changed.
+    """
+    ranking_file = folder / RANKING_FILE
+    try:
+        with ranking_file.open("r", encoding="utf-8") as f:
+            if json.load(f) == ranking:
+                return
+    except (OSError, json.JSONDecodeError):
+        pass
+    write_json_atomic(ranking_file, ranking)
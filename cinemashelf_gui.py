@@ -5,7 +5,8 @@ from pathlib import Path
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QLabel, QLineEdit, 
                             QFileDialog, QCheckBox, QMessageBox, QTabWidget,
-                            QProgressBar, QGroupBox, QFormLayout, QTextEdit)
+                            QProgressBar, QGroupBox, QFormLayout, QTextEdit,
+                            QSpinBox)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QIcon, QFont, QPixmap
 from PyQt5 import QtGui
@@ -18,10 +19,14 @@ import io
 import sys
 
 # Import your existing modules
-from mover import move_movies
-from fetcher import fetch_movie_data
-from categorizer import create_shortcuts_and_categorize
-from main import reload_config, reload_stats, reload_stats, get_stats
+from mover import move_movies, DEFAULT_MOVE_JOBS
+from fetcher import fetch_movie_data, DEFAULT_FETCH_JOBS, DEFAULT_FETCH_RATE
+from categorizer import create_shortcuts_and_categorize, DEFAULT_CATEGORY_OUTPUT
+from linkwriter import DEFAULT_LINK_JOBS, DEFAULT_LINK_STRATEGY
+from dimensions import DIMENSIONS, DEFAULT_SHARDING, category_folders
+from catalog import catalog_exists, DEFAULT_PROFILE
+from main import (reload_config, reload_stats, reload_stats, get_stats, open_response_cache,
+                  open_fetch_scheduler, open_imdb_index)
 
 # Initialize colorama
 init(autoreset=True)
@@ -477,10 +482,12 @@ class CinemaShelfGUI(QMainWindow):
         self.fetch_movies_dir_label = QLabel("")
         self.fetch_json_file_label = QLabel("")
         self.fetch_api_key_label = QLabel("")
+        self.fetch_quota_label = QLabel("")
         
         preview_layout.addRow("Movies directory:", self.fetch_movies_dir_label)
         preview_layout.addRow("JSON data file:", self.fetch_json_file_label)
         preview_layout.addRow("OMDb API key:", self.fetch_api_key_label)
+        preview_layout.addRow("Requests left today:", self.fetch_quota_label)
         
         settings_preview.setLayout(preview_layout)
         layout.addWidget(settings_preview)
@@ -492,7 +499,17 @@ class CinemaShelfGUI(QMainWindow):
         self.fetch_missing_only = QCheckBox("Fetch missing data only")
         self.fetch_missing_only.setChecked(True)
         
+        self.fetch_jobs_input = QSpinBox()
+        self.fetch_jobs_input.setRange(1, 32)
+        self.fetch_jobs_input.setValue(DEFAULT_FETCH_JOBS)
+        self.fetch_jobs_input.setToolTip("Number of OMDb requests sent in parallel")
+        jobs_layout = QHBoxLayout()
+        jobs_layout.addWidget(QLabel("Parallel requests:"))
+        jobs_layout.addWidget(self.fetch_jobs_input)
+        jobs_layout.addStretch()
+        
         options_layout.addWidget(self.fetch_missing_only)
+        options_layout.addLayout(jobs_layout)
         fetch_options.setLayout(options_layout)
         layout.addWidget(fetch_options)
         
@@ -574,6 +591,13 @@ class CinemaShelfGUI(QMainWindow):
         options_layout.addWidget(self.cat_by_imdb)
         options_layout.addWidget(self.cat_by_decade)
         
+        # Additional categories (unchecked by default)
+        self.cat_extra = {}
+        for name in ("genre", "actor", "country", "language", "runtime"):
+            checkbox = QCheckBox(f"Categorize by {DIMENSIONS[name].label}")
+            options_layout.addWidget(checkbox)
+            self.cat_extra[name] = checkbox
+        
         cat_options.setLayout(options_layout)
         layout.addWidget(cat_options)
         
@@ -760,19 +784,38 @@ class CinemaShelfGUI(QMainWindow):
         self.json_file_input.setText(config.get("JSON_FILE", "app_data/movie_data.json"))
         self.categorized_dir_input.setText(config.get("CATEGORIZED_DIR", ""))
         self.api_key_input.setText(config.get("OMDB_API_KEY", ""))
+        self.fetch_jobs_input.setValue(config.get("FETCH_JOBS", DEFAULT_FETCH_JOBS))
+        self.fetch_rate = config.get("FETCH_RATE", DEFAULT_FETCH_RATE)
+        self.imdb_full_details = config.get("IMDB_FULL_DETAILS", False)
+        self.export_json = config.get("EXPORT_JSON", False)
+        self.catalog_profile = config.get("CATALOG_PROFILE", DEFAULT_PROFILE)
+        self.link_jobs = config.get("LINK_JOBS", DEFAULT_LINK_JOBS)
+        self.link_strategy = config.get("LINK_STRATEGY", DEFAULT_LINK_STRATEGY)
+        self.staged_categorize = config.get("STAGED_CATEGORIZE", False)
+        self.category_sharding = config.get("CATEGORY_SHARDING", DEFAULT_SHARDING)
+        self.category_stable_names = config.get("CATEGORY_STABLE_NAMES", False)
+        self.category_output = config.get("CATEGORY_OUTPUT", DEFAULT_CATEGORY_OUTPUT)
+        self.move_jobs = config.get("MOVE_JOBS", DEFAULT_MOVE_JOBS)
         
         # Update labels in other tabs
         self.update_settings_labels()
         
     def save_config(self):  # Save configuration settings to JSON file
 
-        config = {
+        # Keep settings that have no widget (cache, quota, ...) as they are
+        config = {}
+        if CONFIG_FILE.exists():
+            with open(CONFIG_FILE, "r") as f:
+                config = json.load(f)
+        config.update({
             "SOURCE_MOVIES": self.source_folder_input.text(),
             "ALL_MOVIES": self.all_movies_input.text(),
             "JSON_FILE": self.json_file_input.text(),
             "CATEGORIZED_DIR": self.categorized_dir_input.text(),
-            "OMDB_API_KEY": self.api_key_input.text()
-        }
+            "OMDB_API_KEY": self.api_key_input.text(),
+            "FETCH_JOBS": self.fetch_jobs_input.value(),
+            "FETCH_RATE": self.fetch_rate
+        })
         
         CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
         with open(CONFIG_FILE, "w") as f:
@@ -803,12 +846,17 @@ class CinemaShelfGUI(QMainWindow):
         self.fetch_movies_dir_label.setText(self.all_movies_input.text())
         self.fetch_json_file_label.setText(self.json_file_input.text())
         self.fetch_api_key_label.setText("*" * 8)  # Don't show actual API key
+        self.update_quota_label()
         
         # Update Categorize tab
         self.cat_movies_dir_label.setText(self.all_movies_input.text())
         self.cat_json_file_label.setText(self.json_file_input.text())
         self.cat_output_dir_label.setText(self.categorized_dir_input.text())
         
+    def update_quota_label(self):
+        scheduler = open_fetch_scheduler(self.api_key_input.text())
+        self.fetch_quota_label.setText(f"{scheduler.remaining()} / {scheduler.daily_limit}")
+        
     def start_move_movies(self):
         source = Path(self.source_folder_input.text())
         destination = Path(self.all_movies_input.text())
@@ -830,7 +878,7 @@ class CinemaShelfGUI(QMainWindow):
         self.move_log.clear()
         
         # Create and start worker thread
-        self.move_worker = WorkerThread(move_movies, source, destination)
+        self.move_worker = WorkerThread(move_movies, source, destination, self.move_jobs)
         
         # Connect log signal to log display function
         self.move_worker.update_signal.connect(self.update_move_log)
@@ -867,6 +915,9 @@ class CinemaShelfGUI(QMainWindow):
         json_file = Path(self.json_file_input.text())
         api_key = self.api_key_input.text()
         fetch_all = not self.fetch_missing_only.isChecked()
+        jobs = self.fetch_jobs_input.value()
+        # Category links look like movie files, so the category folders are not scanned
+        exclude = category_folders(Path(self.categorized_dir_input.text())) if self.categorized_dir_input.text() else []
         
         if not movies_dir.exists():
             QMessageBox.warning(self, "Error", "Movies folder does not exist!")
@@ -883,7 +934,13 @@ class CinemaShelfGUI(QMainWindow):
         self.fetch_log.clear()
         
         # Create and start worker thread
-        self.fetch_worker = WorkerThread(fetch_movie_data, movies_dir, json_file, api_key, fetch_all)
+        self.fetch_cache = open_response_cache()
+        self.fetch_imdb_index = open_imdb_index()
+        self.fetch_worker = WorkerThread(fetch_movie_data, movies_dir, json_file, api_key, fetch_all,
+                                        jobs, self.fetch_rate, self.fetch_cache,
+                                        open_fetch_scheduler(api_key), self.fetch_imdb_index,
+                                        self.imdb_full_details, self.export_json,
+                                        self.catalog_profile, exclude)
         
         # Connect log signal to log display function
         self.fetch_worker.update_signal.connect(self.update_fetch_log)
@@ -905,6 +962,10 @@ class CinemaShelfGUI(QMainWindow):
         self.fetch_log.ensureCursorVisible()
         
     def on_fetch_finished(self, success):
+        self.fetch_cache.close()
+        if self.fetch_imdb_index:
+            self.fetch_imdb_index.close()
+        self.update_quota_label()
         self.fetch_button.setEnabled(True)
         self.fetch_progress.setVisible(False)
         
@@ -922,16 +983,17 @@ class CinemaShelfGUI(QMainWindow):
         by_director = self.cat_by_director.isChecked()
         by_imdb = self.cat_by_imdb.isChecked()
         by_decade = self.cat_by_decade.isChecked()
+        extra_categories = [name for name, checkbox in self.cat_extra.items() if checkbox.isChecked()]
         
         if not movies_dir.exists():
             QMessageBox.warning(self, "Error", "Movies folder does not exist!")
             return
             
-        if not json_file.exists():
-            QMessageBox.warning(self, "Error", "JSON data file does not exist! Fetch movie information first.")
+        if not catalog_exists(json_file):
+            QMessageBox.warning(self, "Error", "No movie data yet! Fetch movie information first.")
             return
             
-        if not by_director and not by_imdb and not by_decade:
+        if not by_director and not by_imdb and not by_decade and not extra_categories:
             QMessageBox.warning(self, "Error", "Please select at least one categorization option!")
             return
             
@@ -944,7 +1006,10 @@ class CinemaShelfGUI(QMainWindow):
         # Create and start worker thread
         self.cat_worker = WorkerThread(create_shortcuts_and_categorize, 
                                       movies_dir, json_file, output_dir, 
-                                      by_director, by_imdb, by_decade)
+                                      by_director, by_imdb, by_decade, self.link_jobs,
+                                      self.link_strategy, extra_categories, self.staged_categorize,
+                                      self.category_sharding, self.category_stable_names,
+                                      self.category_output, self.catalog_profile)
         
         # Connect log signal to log display function
         self.cat_worker.update_signal.connect(self.update_cat_log)
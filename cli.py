@@ -4,12 +4,17 @@ import os
 import shutil
 from pathlib import Path
 from colorama import Fore, Style, init
-from main import main_move_movies, main_fetch_movie_info, main_categorize_movies, reload_config
+from main import main_move_movies, main_fetch_movie_info, main_categorize_movies, reload_config, get_remaining_quota
+from main import import_movie_data, export_movie_data
+from main import plan_move_movies, plan_categorize_movies, apply_saved_plan
 from fetcher import fetch_movie_data
+from imdb_index import build_index
+from dimensions import DIMENSIONS
 
 init(autoreset=True)  # enable colors in terminal
 
 CONFIG_FILE = Path("app_data/config.json")
+EXTRA_CATEGORIES = [name for name in DIMENSIONS if name not in ("director", "imdb", "decade")]
 
 ASCII_BANNER = f"""
 {Fore.CYAN}     ▄████▄   ██▓ ███▄    █ ▓█████  ███▄ ▄███▓ ▄▄▄           ██████  ██░ ██ ▓█████  ██▓      █████▒
@@ -60,7 +65,7 @@ def setup_config():
     click.echo(Fore.GREEN + "Configuration saved!")
     return config
 
-def main_menu():
+def main_menu(jobs=None):
     while True:
         os.system("cls" if os.name == "nt" else "clear")
         click.echo(center_text(ASCII_BANNER))
@@ -76,17 +81,25 @@ def main_menu():
             click.echo(Fore.YELLOW + "Moving movies...")
             main_move_movies()
         elif choice == 2:
-            fetch_movie_data_menu()
+            fetch_movie_data_menu(jobs)
         elif choice == 3:
             click.echo(Fore.YELLOW + "Categorizing movies...")
             director = click.confirm("Do you want to categorize by director?", default=False)
             imdb = click.confirm("Do you want to categorize by IMDb rating?", default=False)
             decade = click.confirm("Do you want to categorize by production decade?", default=False)
-            if not (director or imdb or decade):
+            extra = click.prompt(f"Other categories, comma separated ({', '.join(EXTRA_CATEGORIES)})",
+                                 default="", show_default=False)
+            extra_categories = [name.strip().lower() for name in extra.split(",") if name.strip()]
+            unknown = [name for name in extra_categories if name not in EXTRA_CATEGORIES]
+            if unknown:
+                click.echo(Fore.RED + f"Unknown categories: {', '.join(unknown)}")
+                click.pause(Fore.YELLOW + "Press any key to continue...")
+                continue
+            if not (director or imdb or decade or extra_categories):
                 click.echo(Fore.RED + "No categorization option selected!")
                 click.pause(Fore.YELLOW + "Press any key to continue...")
                 continue
-            main_categorize_movies(director, imdb, decade)
+            main_categorize_movies(director, imdb, decade, extra_categories)
         elif choice == 4:
             update_config()
             
@@ -97,9 +110,10 @@ def main_menu():
             click.echo(Fore.RED + "Invalid option! Please try again.")
         click.pause(Fore.YELLOW + "Press any key to continue...")
 
-def fetch_movie_data_menu():
+def fetch_movie_data_menu(jobs=None):
     os.system("cls" if os.name == "nt" else "clear")
     click.echo(center_text(ASCII_BANNER))
+    click.echo(Fore.CYAN + f"OMDb requests left today: {get_remaining_quota()}")
     click.echo(Fore.BLUE + "\nPlease choose an option:")
     click.echo("1 - Fetch missing data")
     click.echo("2 - Reload all of the data")
@@ -108,18 +122,20 @@ def fetch_movie_data_menu():
     choice = click.prompt("Enter your choice", type=int)
     if choice == 1:
         click.echo(Fore.YELLOW + "Fetching movie information...")
-        main_fetch_movie_info(False)
+        main_fetch_movie_info(False, jobs)
     elif choice == 2:
         click.echo(Fore.YELLOW + "Fetching movie information...")
-        main_fetch_movie_info(True)
+        main_fetch_movie_info(True, jobs)
     elif choice == 3:
-        main_menu()
+        main_menu(jobs)
     else:
         click.echo(Fore.RED + "Invalid option! Please try again.")
 
 @click.group(invoke_without_command=True)
+@click.option("--jobs", "-j", type=click.IntRange(min=1), default=None,
+              help="Number of parallel OMDb requests when fetching (defaults to FETCH_JOBS from the config).")
 @click.pass_context
-def cli(ctx):
+def cli(ctx, jobs):
     os.makedirs('app_data', exist_ok=True)
     
     config = load_config()
@@ -127,7 +143,7 @@ def cli(ctx):
         config = setup_config()
     ctx.obj = config
     if ctx.invoked_subcommand is None:
-        main_menu()
+        main_menu(jobs)
 
 @cli.command()
 def config():
@@ -147,6 +163,98 @@ def config():
         click.echo(Fore.GREEN + "Configuration updated!")
         return current_config
 
+@cli.command("build-imdb-index")
+@click.argument("basics", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--ratings", type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              help="title.ratings.tsv(.gz) for IMDb ratings.")
+@click.option("--crew", type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              help="title.crew.tsv(.gz) for directors.")
+@click.option("--names", type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              help="name.basics.tsv(.gz) for director names (requires --crew).")
+@click.option("--output", type=click.Path(dir_okay=False, path_type=Path), default=None,
+              help="Index file to write (defaults to IMDB_INDEX_FILE or app_data/imdb_index.db).")
+def build_imdb_index(basics, ratings, crew, names, output):
+    """Build the offline IMDb title index from downloaded dataset dumps."""
+    current_config = load_config()
+    output = output or Path(current_config.get("IMDB_INDEX_FILE") or "app_data/imdb_index.db")
+    click.echo(Fore.YELLOW + f"Building IMDb index from {basics}...")
+    count = build_index(basics, output, ratings, crew, names)
+    current_config["IMDB_INDEX_FILE"] = str(output)
+    save_config(current_config)
+    reload_config()
+    click.echo(Fore.GREEN + f"Indexed {count} titles into {output}")
+
+@cli.command("import-json")
+@click.argument("json_file", type=click.Path(exists=True, dir_okay=False, path_type=Path), required=False)
+def import_json(json_file):
+    """Import a movie_data.json file into the movie catalog (JSON_FILE by default)."""
+    count = import_movie_data(json_file)
+    click.echo(Fore.GREEN + f"Imported {count} records into the catalog")
+
+@cli.command("export-json")
+@click.argument("json_file", type=click.Path(dir_okay=False, path_type=Path), required=False)
+def export_json(json_file):
+    """Export the movie catalog to a movie_data.json file (JSON_FILE by default)."""
+    count = export_movie_data(json_file)
+    click.echo(Fore.GREEN + f"Exported {count} records from the catalog")
+
+def check_plan_options(dry_run, details, save_plan):
+    if not dry_run and (details or save_plan):
+        raise click.UsageError("--details and --save-plan only work with --dry-run.")
+
+def show_plan(plan, details, save_plan):
+    for line in plan.describe(details):
+        click.echo(line)
+    if save_plan:
+        plan.save(save_plan)
+        click.echo(Fore.GREEN + f"Plan saved to {save_plan}; run it with: apply {save_plan}")
+
+@cli.command("move")
+@click.option("--dry-run", is_flag=True, help="Only show what would be moved.")
+@click.option("--details", is_flag=True, help="With --dry-run, list every operation.")
+@click.option("--save-plan", type=click.Path(dir_okay=False, path_type=Path), default=None,
+              help="With --dry-run, save the plan to run it later with apply.")
+def move(dry_run, details, save_plan):
+    """Move movies from SOURCE_MOVIES to ALL_MOVIES."""
+    check_plan_options(dry_run, details, save_plan)
+    if dry_run:
+        show_plan(plan_move_movies(), details, save_plan)
+    else:
+        main_move_movies()
+
+@cli.command("categorize")
+@click.option("--director", is_flag=True, help="Categorize by director.")
+@click.option("--imdb", is_flag=True, help="Categorize by IMDb rating.")
+@click.option("--decade", is_flag=True, help="Categorize by production decade.")
+@click.option("--category", "extra_categories", multiple=True, type=click.Choice(EXTRA_CATEGORIES),
+              help="Another category to create; can be repeated.")
+@click.option("--dry-run", is_flag=True, help="Only show what would change in the category folder.")
+@click.option("--details", is_flag=True, help="With --dry-run, list every operation.")
+@click.option("--save-plan", type=click.Path(dir_okay=False, path_type=Path), default=None,
+              help="With --dry-run, save the plan to run it later with apply.")
+def categorize(director, imdb, decade, extra_categories, dry_run, details, save_plan):
+    """Create the category shortcuts in CATEGORIZED_DIR."""
+    if not (director or imdb or decade or extra_categories):
+        raise click.UsageError("No categorization option selected!")
+    check_plan_options(dry_run, details, save_plan)
+    if dry_run:
+        try:
+            plan = plan_categorize_movies(director, imdb, decade, extra_categories)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        show_plan(plan, details, save_plan)
+    else:
+        main_categorize_movies(director, imdb, decade, extra_categories)
+
+@cli.command("apply")
+@click.argument("plan_file", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+def apply(plan_file):
+    """Run a plan saved with --dry-run --save-plan."""
+    try:
+        apply_saved_plan(plan_file)
+    except (ValueError, KeyError) as e:
+        raise click.ClickException(f"Cannot apply {plan_file}: {e}")
+
 def update_config():
     """Edit the configuration."""
     current_config = load_config()
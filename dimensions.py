@@ -0,0 +1,159 @@
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Iterable
+from catalog import MovieRecord
+from utils import sanitize_folder_name
+
+UNKNOWN = "Unknown"
+# Layout of ranked categories (directors, actors), which can hold thousands of folders:
+# none: all folders in the category root; letter: one subfolder per first letter ("A", "0-9", "#");
+# rank: one subfolder per band of SHARD_SIZE ranks ("0001-0100"); by letter with stable names
+SHARDINGS = ("none", "letter", "rank")
+DEFAULT_SHARDING = "none"
+SHARD_SIZE = 100
+
+class Dimension:
+    """
+    A way of categorizing movies: the category folder, and a function returning the
+    group(s) a movie belongs to. Multi-valued dimensions (genres, actors) return several
+    groups, and the movie is linked into each of them. Ranked dimensions number their
+    group folders by movie count, most movies first.
+    """
+    def __init__(self, name: str, label: str, folder: str,
+                 groups: Callable[[MovieRecord], Iterable[str]], ranked: bool = False):
+        self.name = name
+        self.label = label
+        self.folder = folder
+        self.groups = groups
+        self.ranked = ranked
+
+    def __repr__(self) -> str:
+        return f"Dimension({self.name!r})"
+
+def runtime_band(runtime: int | None) -> str:
+    if not runtime:
+        return UNKNOWN
+    if runtime < 90:
+        return "Under 90 min"
+    if runtime < 120:
+        return "90-119 min"
+    if runtime < 150:
+        return "120-149 min"
+    return "150 min and over"
+
+def _or_unknown(values: tuple) -> tuple:
+    return values or (UNKNOWN,)
+
+DIMENSIONS = {
+    dimension.name: dimension for dimension in (
+        Dimension("director", "Director", "ByDirector", lambda movie: (movie.director or UNKNOWN,), ranked=True),
+        Dimension("imdb", "IMDb", "ByIMDBRating", lambda movie: (f"{movie.rating or 0.0:.1f}",)),
+        Dimension("decade", "Decade", "ByDecade",
+                  lambda movie: (f"{movie.decade}s" if movie.decade else UNKNOWN,)),
+        Dimension("genre", "Genre", "ByGenre", lambda movie: _or_unknown(movie.genres)),
+        Dimension("actor", "Actor", "ByActor", lambda movie: _or_unknown(movie.actors), ranked=True),
+        Dimension("country", "Country", "ByCountry", lambda movie: _or_unknown(movie.countries)),
+        Dimension("language", "Language", "ByLanguage", lambda movie: _or_unknown(movie.languages)),
+        Dimension("runtime", "Runtime", "ByRuntime", lambda movie: (runtime_band(movie.runtime),)),
+    )
+}
+
+def register_dimension(dimension: Dimension) -> None:
+    """
+    Adds a category dimension, or replaces the one with the same name.
+    """
+    DIMENSIONS[dimension.name] = dimension
+
+def category_folders(dest_base: Path) -> list[Path]:
+    """
+    Returns dest_base and the folder of every registered dimension in it: the folders
+    holding category links, which scans for movie files have to leave out.
+    """
+    return [Path(dest_base), *(Path(dest_base) / dimension.folder for dimension in DIMENSIONS.values())]
+
+def get_dimensions(names: Iterable[str]) -> list[Dimension]:
+    """
+    Looks up dimensions by name, keeping the given order and dropping repeats.
+
+    Raises:
+    ValueError: If a name is not a registered dimension.
+    """
+    dimensions = []
+    for name in names:
+        if name not in DIMENSIONS:
+            raise ValueError(f"Unknown category: {name} (choose from {', '.join(DIMENSIONS)})")
+        if DIMENSIONS[name] not in dimensions:
+            dimensions.append(DIMENSIONS[name])
+    return dimensions
+
+def letter_shard(name: str) -> str:
+    """
+    Shard folder for a group name: its first letter without accents, "0-9" or "#".
+    """
+    for char in unicodedata.normalize("NFKD", name):
+        if char.isalpha() and char.isascii():
+            return char.upper()
+        if char.isdigit():
+            return "0-9"
+        if char.isalnum():
+            return "#"
+    return "#"
+
+def rank_shard(rank: int) -> str:
+    start = (rank - 1) // SHARD_SIZE * SHARD_SIZE + 1
+    return f"{start:04d}-{start + SHARD_SIZE - 1:04d}"
+
+def group_movies(movies: Iterable[MovieRecord], dimensions: list[Dimension], sharding: str = DEFAULT_SHARDING,
+                 stable_names: bool = False) -> dict[str, dict[str, list[MovieRecord]]]:
+    """
+    Groups movies by every dimension in a single pass over the records.
+
+    Parameters:
+    movies (Iterable[MovieRecord]): The movies to group.
+    dimensions (list[Dimension]): The dimensions to group by.
+    sharding (str): Layout of ranked dimensions, one of SHARDINGS.
+    stable_names (bool): Leave the rank out of ranked folder names, so folders are not
+        renamed when movie counts shift. Rank sharding then shards by letter, since a
+        rank band would move folders all the same.
+
+    Returns:
+    dict: {dimension name: {group folder: [movies]}}. Groups keep the order in which they
+    were first seen; ranked dimensions are ordered by movie count and their folder names
+    carry the rank ("1. Christopher Nolan") unless stable_names is set. With sharding,
+    ranked group folders are relative paths below a shard folder ("C/1. Christopher Nolan").
+
+    Raises:
+    ValueError: If sharding is not one of SHARDINGS.
+    """
+    if sharding not in SHARDINGS:
+        raise ValueError(f"Unknown sharding: {sharding} (choose from {', '.join(SHARDINGS)})")
+    groups = {dimension.name: {} for dimension in dimensions}
+    for movie in movies:
+        for dimension in dimensions:
+            dimension_groups = groups[dimension.name]
+            for group in dict.fromkeys(dimension.groups(movie)):
+                dimension_groups.setdefault(group, []).append(movie)
+
+    result = {}
+    for dimension in dimensions:
+        dimension_groups = groups[dimension.name]
+        if dimension.ranked:
+            counts = Counter({group: len(movies) for group, movies in dimension_groups.items()})
+            ordered = []
+            for rank, (group, _) in enumerate(counts.most_common(), 1):
+                folder = sanitize_folder_name(group)
+                if not stable_names:
+                    folder = f"{rank}. {folder}"
+                if sharding == "letter" or (sharding == "rank" and stable_names):
+                    folder = f"{letter_shard(group)}/{folder}"
+                elif sharding == "rank":
+                    folder = f"{rank_shard(rank)}/{folder}"
+                ordered.append((folder, dimension_groups[group]))
+        else:
+            ordered = [(sanitize_folder_name(group), movies) for group, movies in dimension_groups.items()]
+        folders = result[dimension.name] = {}
+        for folder, movies in ordered:
+            # Different names can sanitize to the same folder
+            folders.setdefault(folder, []).extend(movies)
+    return result
@@ -1,67 +1,416 @@
-import json
+import random
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from utils import parse_movie_filename
+from typing import Iterable
+from utils import parse_movie_filename, strip_release_tags, extract_year
+from cache import ResponseCache, normalize_title, title_key, imdb_key
+from scanner import scan_video_files, find_imdb_id
+from scheduler import FetchScheduler, QuotaExceededError
+from imdb_index import ImdbIndex
+from catalog import open_catalog, DEFAULT_PROFILE
 from colorama import Fore
-def get_movie_info(title: str, year: str, api_key: str) -> dict:
+
+DEFAULT_FETCH_JOBS = 4
+DEFAULT_FETCH_RATE = 10.0  # requests per second, shared by all workers
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by all fetch workers.
+    Tokens refill at `rate` per second up to `burst`; acquire() blocks until one is available.
+    """
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def ordered_map(func, items, jobs: int):
+    """
+    Like map(), but runs func on up to `jobs` worker threads.
+    Results are yielded in input order and at most 2 * jobs calls are in flight,
+    so `items` may be a lazy generator.
+    """
+    if jobs <= 1:
+        yield from map(func, items)
+        return
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(func, item))
+            if len(pending) >= jobs * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+OMDB_URL = "https://www.omdbapi.com/"
+CONNECT_TIMEOUT = 5   # seconds
+READ_TIMEOUT = 20     # seconds
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5    # seconds, doubled on every retry
+BACKOFF_MAX = 30.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+class OmdbError(Exception):
+    """Raised when an OMDb request still fails after all retries."""
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide HTTP session used for every OMDb call.
+    Connections are kept alive and pooled, sized for the largest fetch worker pool.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Exponential backoff with full jitter for the given retry attempt (0-based).
+    """
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+def is_quota_error(data: dict) -> bool:
+    """
+    Checks whether an OMDb error body reports the daily request limit (as opposed to a miss).
+    """
+    return data.get("Response") == "False" and "limit" in data.get("Error", "").lower()
+
+def omdb_request(params: dict, api_key: str, limiter: RateLimiter | None = None,
+                 scheduler: FetchScheduler | None = None) -> dict:
+    """
+    Sends a query to the OMDb API through the shared session.
+    Query values are URL-encoded by requests, so titles may contain any character.
+    Connection errors, timeouts and 429/5xx responses are retried with backoff.
+    If a limiter is given, every attempt waits for a token first; if a scheduler is
+    given, every attempt is counted against the daily budget.
+
+    Returns:
+    dict: The decoded JSON body (which may itself report "Response": "False").
+
+    Raises:
+    QuotaExceededError: If the daily budget is used up or OMDb reports its request limit.
+    OmdbError: If the request could not be completed after MAX_RETRIES retries.
+    """
+    query = dict(params, apikey=api_key)
+    last_error = None
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt:
+            time.sleep(backoff_delay(attempt - 1))
+        if scheduler is not None:
+            scheduler.consume()
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            response = get_session().get(OMDB_URL, params=query, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            last_error = e
+            continue
+        if response.status_code in RETRYABLE_STATUS:
+            last_error = f"HTTP {response.status_code}"
+            continue
+        try:
+            data = response.json()
+        except ValueError as e:
+            raise OmdbError(f"Invalid response (HTTP {response.status_code}): {e}")
+        if is_quota_error(data):
+            if scheduler is not None:
+                scheduler.exhaust()
+            raise QuotaExceededError(data["Error"])
+        if response.status_code != 200:
+            raise OmdbError(data.get("Error") or f"HTTP {response.status_code}")
+        return data
+    raise OmdbError(f"Gave up after {MAX_RETRIES + 1} attempts: {last_error}")
+
+def cached_omdb_lookup(key: str, params: dict, api_key: str, cache: ResponseCache | None,
+                       limiter: RateLimiter | None, scheduler: FetchScheduler | None) -> dict:
+    """
+    Runs an OMDb query unless a fresh response is cached under key, and caches what it finds
+    under key and under the IMDb ID of the result.
+
+    Returns:
+    dict: The OMDb response, or {} if OMDb found nothing.
+
+    Raises:
+    QuotaExceededError, OmdbError: See omdb_request.
+    """
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    data = omdb_request(params, api_key, limiter, scheduler)
+    if data.get("Response", "False") != "True":
+        return {}
+    if cache is not None:
+        cache.put(key, data)
+        if data.get("imdbID"):
+            cache.put(imdb_key(data["imdbID"]), data)
+    return data
+
+def get_movie_info(title: str, year: str, api_key: str, cache: ResponseCache | None = None,
+                   limiter: RateLimiter | None = None, scheduler: FetchScheduler | None = None) -> dict:
     """
     Fetch movie information from the OMDb API.
+    A fresh entry in the response cache is returned without contacting OMDb.
+    QuotaExceededError is propagated so callers can tell a used-up budget from a miss.
     """
-    url = f"http://www.omdbapi.com/?t={title}&y={year}&apikey={api_key}"
+    params = {"t": title}
+    if year:
+        params["y"] = year
     try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get("Response", "False") == "True":
-                return data
-    except Exception as e:
+        return cached_omdb_lookup(title_key(title, year), params, api_key, cache, limiter, scheduler)
+    except OmdbError as e:
         print(f"Error retrieving data for {title}: {e}")
     return {}
 
-def fetch_movie_data(main_folder: Path, json_file: Path, api_key: str, fetch_all: bool) -> None:
+def get_movie_info_by_id(imdb_id: str, api_key: str, cache: ResponseCache | None = None,
+                         limiter: RateLimiter | None = None, scheduler: FetchScheduler | None = None) -> dict:
+    """
+    Fetch movie information from the OMDb API by its exact IMDb ID (e.g. tt0123456).
+    A fresh entry in the response cache is returned without contacting OMDb.
+    QuotaExceededError is propagated so callers can tell a used-up budget from a miss.
+    """
+    try:
+        return cached_omdb_lookup(imdb_key(imdb_id), {"i": imdb_id}, api_key, cache, limiter, scheduler)
+    except OmdbError as e:
+        print(f"Error retrieving data for {imdb_id}: {e}")
+    return {}
+
+def rank_search_results(results: list[dict], title: str, year: str) -> list[dict]:
+    """
+    Orders OMDb search results best first: exact title matches, then movies over series
+    and episodes, then by distance to year. With a year, results more than a year off are dropped.
+    """
+    wanted = normalize_title(title)
+    target = int(year) if year else None
+    ranked = []
+    for position, result in enumerate(results):
+        result_year = extract_year(result.get("Year", ""))
+        distance = abs(result_year - target) if target and result_year else 0
+        if target and (result_year is None or distance > 1):
+            continue
+        score = (normalize_title(result.get("Title", "")) != wanted,
+                 result.get("Type") != "movie", distance, position)
+        ranked.append((score, result))
+    return [result for _, result in sorted(ranked, key=lambda item: item[0])]
+
+def resolve_movie(title: str, year: str, api_key: str, cache: ResponseCache | None = None,
+                  limiter: RateLimiter | None = None, scheduler: FetchScheduler | None = None) -> dict:
+    """
+    Resolves a parsed (title, year) pair through increasingly loose OMDb lookups:
+    the exact title and year, the title without the year, the title with scene release
+    tags stripped, and finally an OMDb search ranked by year and type.
+
+    Returns:
+    dict: The OMDb record, or {} if every tier missed.
+
+    Raises:
+    QuotaExceededError, OmdbError: See omdb_request.
+    """
+    cleaned = strip_release_tags(title)
+    tiers = [(title, year)]
+    if year:
+        tiers.append((title, ""))
+    if normalize_title(cleaned) != normalize_title(title):
+        tiers.append((cleaned, year))
+    for tier_title, tier_year in tiers:
+        params = {"t": tier_title}
+        if tier_year:
+            params["y"] = tier_year
+        data = cached_omdb_lookup(title_key(tier_title, tier_year), params, api_key, cache, limiter, scheduler)
+        if data:
+            return data
+
+    params = {"s": cleaned, "type": "movie"}
+    found = cached_omdb_lookup(f"s:{normalize_title(cleaned)}", params, api_key, cache, limiter, scheduler)
+    for result in rank_search_results(found.get("Search", []), cleaned, year)[:1]:
+        return cached_omdb_lookup(imdb_key(result["imdbID"]), {"i": result["imdbID"]},
+                                  api_key, cache, limiter, scheduler)
+    return {}
+
+def fetch_movie_data(main_folder: Path, json_file: Path, api_key: str, fetch_all: bool,
+                     jobs: int = DEFAULT_FETCH_JOBS, rate: float = DEFAULT_FETCH_RATE,
+                     cache: ResponseCache | None = None, scheduler: FetchScheduler | None = None,
+                     imdb_index: ImdbIndex | None = None, full_details: bool = False,
+                     export_json: bool = False, profile: str = DEFAULT_PROFILE,
+                     exclude: Iterable[Path] = ()) -> None:
     """
     Scans the main_folder for movie files, fetches their data from OMDb,
-    and stores the information in a JSON file.
+    and stores the information in the movie catalog.
+    Files with a known IMDb ID (stored on the record, in the file name or in a .nfo
+    file next to it) are looked up exactly by ID, the rest through resolve_movie.
+    Titles that could not be resolved are not asked for again until their re-check
+    interval in the cache's negative entries has passed.
+    Files are fetched in priority order: new files first, then files whose title was
+    never resolved, then (with fetch_all) existing records, stalest first. When the daily
+    request budget runs out the run stops requesting and the rest waits for the next run.
 
     Parameters:
     main_folder (Path): The main directory containing movie files.
-    json_file (Path): The JSON file where movie data will be stored.
+    json_file (Path): The configured JSON data file; the catalog is stored next to it (see catalog.open_catalog).
     api_key (str): The API key for accessing the OMDb API.
     fetch_all (bool): If True, updates data for all movies. If False, only fetches data for new movies.
+    jobs (int): Number of concurrent OMDb requests. 1 fetches sequentially.
+    rate (float): Maximum OMDb requests per second across all workers (0 disables the limit).
+    cache (ResponseCache | None): OMDb response cache. Defaults to omdb_cache.db next to json_file.
+    scheduler (FetchScheduler | None): Daily budget tracker. Defaults to omdb_quota.json next to json_file.
+    imdb_index (ImdbIndex | None): Offline IMDb dataset index. Titles found there need no OMDb request.
+    full_details (bool): With an imdb_index, still ask OMDb for the full record (plot, poster, ...)
+        and keep the index data only if OMDb has nothing.
+    export_json (bool): Also write the whole catalog to json_file when done.
+    profile (str): Which OMDb fields to keep, "full" or "minimal" (see catalog.FIELD_PROFILES).
+    exclude (Iterable[Path]): Folders not to scan, such as the category folders, whose
+        links would otherwise be taken for movie files.
     """
-    # Load existing data if available
-    if json_file.exists():
-        with json_file.open("r", encoding="utf-8") as f:
-            try:
-                movies = json.load(f)
-            except json.JSONDecodeError:
-                movies = []
-    else:
-        movies = []
-
-    video_extensions = ('.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv')
-    movie_files = list(main_folder.rglob("*"))
+    json_file.parent.mkdir(parents=True, exist_ok=True)
+    store = open_catalog(json_file, profile)
+    known = {file_name: (imdb_id, fetched_at or 0) for file_name, imdb_id, fetched_at
+             in store.query("SELECT file_name, imdb_id, fetched_at FROM movies")}
+
+    owns_scheduler = scheduler is None
+    if owns_scheduler:
+        scheduler = FetchScheduler(json_file.with_name("omdb_quota.json"), api_key)
+    print(f"OMDb requests left today: {scheduler.remaining()}/{scheduler.daily_limit}")
+
+    def files_to_fetch():
+        # Consumed lazily by the workers, so requests for new files start while the tree
+        # is still being scanned; lower priority files are queued until the scan is done.
+        queued = set()
+        unresolved = []
+        stale = []
+        for entry in scan_video_files(main_folder, exclude):
+            file_name = entry.name
+            if file_name in queued:
+                continue
+            queued.add(file_name)
+            if file_name not in known:
+                if scheduler.is_unresolved(file_name):
+                    unresolved.append(Path(entry.path))
+                else:
+                    yield Path(entry.path)
+            elif fetch_all:
+                stale.append(Path(entry.path))
+        yield from unresolved
+        stale.sort(key=lambda file: known[file.name][1])
+        yield from stale
+
+    limiter = RateLimiter(rate)
+    owns_cache = cache is None
+    if owns_cache:
+        cache = ResponseCache(json_file.with_name("omdb_cache.db"))
+
+    def lookup_offline(title: str, year: str, imdb_id: str | None) -> dict | None:
+        if imdb_index is None:
+            return None
+        return (imdb_id and imdb_index.lookup_id(imdb_id)) or imdb_index.lookup(title, year)
+
+    def fetch(file: Path) -> tuple[Path, dict | None, str | None]:
+        # Returns (file, data, state): data is None if the quota ran out and {} for a miss;
+        # state is "skipped" for a known miss that is not due for a re-check yet and
+        # "error" for a request that failed, which is neither a miss nor a result.
+        title, year = parse_movie_filename(file.name)
+        imdb_id = known.get(file.name, (None, 0))[0] or find_imdb_id(file)
+        offline = lookup_offline(title, year, imdb_id)
+        if offline and not full_details:
+            return file, offline, None
+        miss_key = title_key(title, year)
+        try:
+            if imdb_id:
+                data = get_movie_info_by_id(imdb_id, api_key, cache, limiter, scheduler)
+                if data:
+                    return file, data, None
+            if cache.is_known_miss(miss_key):
+                return file, offline or {}, None if offline else "skipped"
+            data = resolve_movie(title, year, api_key, cache, limiter, scheduler)
+        except QuotaExceededError:
+            return file, offline, None
+        except OmdbError as e:
+            # Transient failure: not a real miss, so it is neither put in the negative cache
+            # nor marked unresolved; the file is tried again on the next run.
+            print(f"Error retrieving data for {title}: {e}")
+            return file, offline, None if offline else "error"
+        if data:
+            cache.clear_miss(miss_key)
+        else:
+            cache.record_miss(miss_key)
+        return file, data or offline or {}, None
+
     count = 0
     missing_count = 0
-    for file in movie_files:
-        if file.is_file() and file.suffix.lower() in video_extensions:
-            file_name = file.name
-            if not any(movie.get("file_name") == file_name for movie in movies) or fetch_all:
-                count += 1
-                print(f"Fetching data for: {file_name}")
-                title, year = parse_movie_filename(file_name)
-                data = get_movie_info(title, year, api_key)
-                if not data:
-                    print(Fore.RED + f"{file} not Found")
-                    missing_count += 1
-                    continue
-                movies.append({
-                    "file_name": file_name,
-                    "data": data
-                })
-    print(Fore.GREEN + f"Total movies updated: {count}")
-    print(Fore.RED + f"{missing_count} Movies not found")
-    print(Fore.GREEN + f"Total movies processed: {len(movies)}")
-    with json_file.open("w", encoding="utf-8") as f:
-        json.dump(movies, f, ensure_ascii=False, indent=4)
-    print("Movie data saved to JSON file.")
+    postponed_count = 0
+    skipped_count = 0
+    failed_count = 0
+    try:
+        for file, data, state in ordered_map(fetch, files_to_fetch(), jobs):
+            if state == "skipped":
+                skipped_count += 1
+                continue
+            if state == "error":
+                failed_count += 1
+                continue
+            if data is None:
+                if not postponed_count:
+                    print(Fore.YELLOW + "Daily OMDb request limit reached; remaining files will be fetched on the next run.")
+                postponed_count += 1
+                continue
+            count += 1
+            print(f"Fetching data for: {file.name}")
+            if not data:
+                print(Fore.RED + f"{file} not Found")
+                missing_count += 1
+                scheduler.mark_unresolved(file.name)
+                continue
+            scheduler.mark_resolved(file.name)
+            # Each record is committed on its own, so an interrupted run keeps everything fetched so far.
+            store.upsert({
+                "file_name": file.name,
+                "imdb_id": data.get("imdbID"),
+                "fetched_at": int(time.time()),
+                "data": data
+            })
+        print(Fore.GREEN + f"Total movies updated: {count}")
+        print(Fore.RED + f"{missing_count} Movies not found")
+        if skipped_count:
+            print(Fore.YELLOW + f"{skipped_count} Movies skipped (not found before, re-checked later)")
+        if failed_count:
+            print(Fore.YELLOW + f"{failed_count} Movies failed to fetch, retried on the next run")
+        if postponed_count:
+            print(Fore.YELLOW + f"{postponed_count} Movies postponed until the daily limit resets")
+        print(f"OMDb requests left today: {scheduler.remaining()}/{scheduler.daily_limit}")
+        print(Fore.GREEN + f"Total movies processed: {len(store)}")
+        if export_json:
+            store.export_json(json_file)
+            print("Movie data exported to JSON file.")
+        print("Movie data saved to the catalog.")
+    finally:
+        store.close()
+        if owns_cache:
+            cache.close()
+        scheduler.save()
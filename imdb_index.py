@@ -0,0 +1,210 @@
+import gzip
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterator
+from cache import normalize_title
+
+MOVIE_TYPES = frozenset({"movie", "tvMovie", "video", "tvSpecial"})
+BATCH_SIZE = 50000
+
+def read_tsv(path: Path) -> Iterator[list[str]]:
+    """
+    Streams the rows of an IMDb dataset file (.tsv or .tsv.gz) one at a time, skipping
+    the header. IMDb dumps use no quoting, and \\N marks missing values.
+    """
+    path = Path(path)
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        next(f, None)
+        for line in f:
+            yield line.rstrip("\n").split("\t")
+
+def null(value: str) -> str | None:
+    return None if value == "\\N" else value
+
+def _batched(rows, size: int = BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def build_index(basics_file: Path, index_file: Path, ratings_file: Path | None = None,
+                crew_file: Path | None = None, names_file: Path | None = None) -> int:
+    """
+    Builds the offline title index from IMDb dataset dumps (https://datasets.imdbws.com).
+    Every file is streamed row by row into SQLite, so memory use does not depend on the
+    size of the dumps. The index is built next to index_file and swapped in when complete.
+
+    Parameters:
+    basics_file (Path): title.basics.tsv(.gz), required.
+    index_file (Path): Where to write the index.
+    ratings_file (Path | None): title.ratings.tsv(.gz) for IMDb ratings and vote counts.
+    crew_file (Path | None): title.crew.tsv(.gz) for directors.
+    names_file (Path | None): name.basics.tsv(.gz) to turn director IDs into names.
+
+    Returns:
+    int: The number of titles indexed.
+    """
+    index_file = Path(index_file)
+    index_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = index_file.with_name(index_file.name + ".tmp")
+    tmp_file.unlink(missing_ok=True)
+    conn = sqlite3.connect(str(tmp_file))
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript("""
+            CREATE TABLE titles (
+                tconst TEXT PRIMARY KEY, title TEXT NOT NULL, type TEXT, year INTEGER,
+                runtime INTEGER, genres TEXT, rating REAL, votes INTEGER
+            ) WITHOUT ROWID;
+            CREATE TABLE title_keys (key TEXT NOT NULL, year INTEGER, tconst TEXT NOT NULL);
+            CREATE TABLE title_directors (tconst TEXT NOT NULL, ord INTEGER NOT NULL, nconst TEXT NOT NULL);
+            CREATE TABLE names (nconst TEXT PRIMARY KEY, name TEXT NOT NULL) WITHOUT ROWID;
+        """)
+
+        count = 0
+        for batch in _batched(row for row in read_tsv(basics_file)
+                             if len(row) == 9 and row[1] in MOVIE_TYPES):
+            titles = []
+            keys = []
+            for tconst, title_type, primary, original, _adult, start, _end, runtime, genres in batch:
+                year = int(start) if start.isdigit() else None
+                titles.append((tconst, primary, title_type, year,
+                               int(runtime) if runtime.isdigit() else None, null(genres)))
+                keys.append((normalize_title(primary), year, tconst))
+                if original != primary:
+                    keys.append((normalize_title(original), year, tconst))
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO titles (tconst, title, type, year, runtime, genres) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", titles)
+                conn.executemany("INSERT INTO title_keys VALUES (?, ?, ?)", keys)
+            count += len(titles)
+        conn.execute("CREATE INDEX title_keys_key ON title_keys (key, year)")
+
+        if ratings_file:
+            for batch in _batched(row for row in read_tsv(ratings_file) if len(row) == 3):
+                with conn:
+                    conn.executemany(
+                        "UPDATE titles SET rating = ?, votes = ? WHERE tconst = ?",
+                        ((float(rating), int(votes), tconst) for tconst, rating, votes in batch))
+
+        if crew_file:
+            def director_rows():
+                for row in read_tsv(crew_file):
+                    tconst, directors = row[0], row[1]
+                    if directors != "\\N":
+                        for ord_, nconst in enumerate(directors.split(",")):
+                            yield tconst, ord_, nconst, tconst
+            for batch in _batched(director_rows()):
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO title_directors SELECT ?, ?, ? "
+                        "WHERE EXISTS (SELECT 1 FROM titles WHERE tconst = ?)", batch)
+            conn.execute("CREATE INDEX title_directors_tconst ON title_directors (tconst, ord)")
+            conn.execute("CREATE INDEX title_directors_nconst ON title_directors (nconst)")
+
+            if names_file:
+                for batch in _batched(read_tsv(names_file)):
+                    with conn:
+                        conn.executemany(
+                            "INSERT OR IGNORE INTO names SELECT ?, ? "
+                            "WHERE EXISTS (SELECT 1 FROM title_directors WHERE nconst = ?)",
+                            ((row[0], row[1], row[0]) for row in batch))
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp_file, index_file)
+    return count
+
+class ImdbIndex:
+    """
+    Read-only lookups against an index built by build_index.
+    Results are shaped like OMDb responses so they can be stored as catalog data directly.
+    """
+    def __init__(self, index_file: Path):
+        self.index_file = Path(index_file)
+        self.conn = sqlite3.connect(self.index_file.resolve().as_uri() + "?mode=ro", uri=True,
+                                    check_same_thread=False)
+        self.lock = threading.Lock()
+
+    def lookup(self, title: str, year: str = "") -> dict | None:
+        """
+        Finds the best match for a (title, year) pair as produced by parse_movie_filename.
+        With a year, the closest year within one year wins; ties and year-less lookups
+        prefer the title with the most IMDb votes.
+
+        Returns:
+        dict | None: An OMDb-style payload, or None if nothing matches.
+        """
+        key = normalize_title(title)
+        if not key:
+            return None
+        query = ("SELECT t.tconst, t.title, t.type, t.year, t.runtime, t.genres, t.rating, t.votes "
+                 "FROM title_keys k JOIN titles t ON t.tconst = k.tconst WHERE k.key = ?")
+        with self.lock:
+            if year:
+                row = self.conn.execute(
+                    query + " AND k.year BETWEEN ? AND ? ORDER BY abs(k.year - ?), t.votes DESC LIMIT 1",
+                    (key, int(year) - 1, int(year) + 1, int(year))).fetchone()
+            else:
+                row = self.conn.execute(query + " ORDER BY t.votes DESC LIMIT 1", (key,)).fetchone()
+            if row is None:
+                return None
+            directors = self._directors(row[0])
+        return self._payload(row, directors)
+
+    def lookup_id(self, imdb_id: str) -> dict | None:
+        """
+        Looks up a title by its exact IMDb ID.
+
+        Returns:
+        dict | None: An OMDb-style payload, or None if the ID is not in the index.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT tconst, title, type, year, runtime, genres, rating, votes FROM titles WHERE tconst = ?",
+                (imdb_id,)).fetchone()
+            if row is None:
+                return None
+            directors = self._directors(row[0])
+        return self._payload(row, directors)
+
+    def _directors(self, tconst: str) -> list[str]:
+        return [name for (name,) in self.conn.execute(
+            "SELECT coalesce(n.name, d.nconst) FROM title_directors d "
+            "LEFT JOIN names n ON n.nconst = d.nconst WHERE d.tconst = ? ORDER BY d.ord", (tconst,))]
+
+    @staticmethod
+    def _payload(row, directors: list[str]) -> dict:
+        tconst, title, title_type, year, runtime, genres, rating, votes = row
+        return {
+            "Title": title,
+            "Year": str(year) if year else "N/A",
+            "Runtime": f"{runtime} min" if runtime else "N/A",
+            "Genre": genres.replace(",", ", ") if genres else "N/A",
+            "Director": ", ".join(directors) if directors else "N/A",
+            "imdbRating": f"{rating:.1f}" if rating is not None else "N/A",
+            "imdbVotes": f"{votes:,}" if votes is not None else "N/A",
+            "imdbID": tconst,
+            "Type": "movie" if title_type in ("movie", "tvMovie", "tvSpecial") else title_type,
+            "Response": "True",
+            "Source": "imdb-dataset",
+        }
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,186 @@
+import os
+import platform
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable
+from lnk import write_lnk
+
+DEFAULT_LINK_JOBS = 8
+# auto: .lnk files on Windows, symlinks elsewhere; lnk: pure-Python .lnk writer;
+# shell: .lnk through the Windows shell (COM); relsymlink: symlinks relative to the link,
+# which survive the whole tree being mounted elsewhere; hardlink: falls back to a symlink
+# where the file system cannot hard link (e.g. across volumes).
+LINK_STRATEGIES = ("auto", "lnk", "shell", "symlink", "relsymlink", "hardlink")
+DEFAULT_LINK_STRATEGY = "auto"
+
+_local = threading.local()
+
+def _shell():
+    """
+    Returns the WScript.Shell object of the current thread, creating it on first use.
+    COM objects are bound to the thread that created them, so every worker gets its own.
+    """
+    shell = getattr(_local, "shell", None)
+    if shell is None:
+        import pythoncom
+        import win32com.client
+        pythoncom.CoInitialize()
+        shell = _local.shell = win32com.client.Dispatch("WScript.Shell")
+    return shell
+
+def _release_shell() -> None:
+    """
+    Releases the WScript.Shell object of the current thread, if it has one, and
+    uninitializes COM there.
+    """
+    if getattr(_local, "shell", None) is not None:
+        import pythoncom
+        _local.shell = None
+        pythoncom.CoUninitialize()
+
+def create_shortcut(target: Path, shortcut_path: Path) -> None:
+    """
+    Creates a shortcut to the target file at shortcut_path.
+    On Windows, uses win32com; on other OS, creates a symbolic link.
+    """
+    if platform.system() == "Windows":
+        shortcut = _shell().CreateShortCut(str(shortcut_path))
+        shortcut.Targetpath = str(target)
+        shortcut.WorkingDirectory = str(target.parent)
+        shortcut.save()
+    else:
+        shortcut_path.symlink_to(target)
+
+def create_relative_symlink(target: Path, link_path: Path) -> None:
+    link_path.symlink_to(os.path.relpath(target, link_path.parent))
+
+def create_hardlink(target: Path, link_path: Path) -> None:
+    try:
+        os.link(target, link_path)
+    except OSError:
+        link_path.symlink_to(target)
+
+def resolve_strategy(strategy: str) -> str:
+    """
+    Validates a link strategy and resolves "auto" for the current platform.
+    """
+    if strategy not in LINK_STRATEGIES:
+        raise ValueError(f"Unknown link strategy: {strategy}")
+    if strategy == "auto":
+        return "lnk" if platform.system() == "Windows" else "symlink"
+    return strategy
+
+def get_link_creator(strategy: str) -> Callable[[Path, Path], None]:
+    """
+    Returns the function that creates a link with the given strategy, called as func(target, link_path).
+    """
+    return {
+        "lnk": write_lnk,
+        "shell": create_shortcut,
+        "symlink": lambda target, link_path: link_path.symlink_to(target),
+        "relsymlink": create_relative_symlink,
+        "hardlink": create_hardlink,
+    }[resolve_strategy(strategy)]
+
+def link_name(name: str, target: Path, strategy: str) -> str:
+    """
+    File name of a link called name: shortcuts get .lnk, file system links keep the
+    target's extension so players recognize them.
+    """
+    return name + (".lnk" if resolve_strategy(strategy) in ("lnk", "shell") else target.suffix)
+
+class LinkWriter:
+    """
+    Writes shortcuts on a bounded pool of worker threads and keeps a throughput
+    report per category. Link writing is pure file system I/O, so it overlaps well
+    on SSDs and network shares.
+    The worker threads are started on first use and kept for every category written;
+    close() stops them. Each worker releases its COM state when it exits.
+    """
+    def __init__(self, create_link: Callable[[Path, Path], None] = create_shortcut,
+                 jobs: int = DEFAULT_LINK_JOBS):
+        self.create_link = create_link
+        self.jobs = max(1, jobs)
+        self.stats = {}
+        self.tasks = queue.SimpleQueue()
+        self.workers = []
+
+    def _write_one(self, entry) -> Exception | None:
+        target, link_path, replace = entry
+        try:
+            if replace:
+                link_path.unlink(missing_ok=True)
+            self.create_link(target, link_path)
+        except Exception as e:  # OSError, or a COM error from the shell
+            return e
+        return None
+
+    def _work(self) -> None:
+        # Runs entries from the queue until close() sends None
+        try:
+            while (task := self.tasks.get()) is not None:
+                future, entry = task
+                try:
+                    future.set_result(self._write_one(entry))
+                except BaseException as e:  # handed to write(), so it never waits for a lost result
+                    future.set_exception(e)
+        finally:
+            _release_shell()
+
+    def write(self, links: list[tuple[Path, Path, bool]], category: str = "") -> list[Exception | None]:
+        """
+        Writes every (target, link_path, replace) entry. With replace, an existing file
+        at link_path is removed first.
+
+        Returns:
+        list[Exception | None]: The error for every entry (None if it was written), in order.
+        """
+        start = time.perf_counter()
+        if self.jobs == 1 or len(links) < 2:
+            errors = [self._write_one(entry) for entry in links]
+        else:
+            while len(self.workers) < self.jobs:
+                worker = threading.Thread(target=self._work, name=f"cinemashelf-links-{len(self.workers)}",
+                                          daemon=True)
+                worker.start()
+                self.workers.append(worker)
+            futures = []
+            for entry in links:
+                futures.append(Future())
+                self.tasks.put((futures[-1], entry))
+            errors = [future.result() for future in futures]
+        count, seconds = self.stats.get(category, (0, 0.0))
+        written = sum(1 for error in errors if error is None)
+        self.stats[category] = (count + written, seconds + time.perf_counter() - start)
+        return errors
+
+    def close(self) -> None:
+        """
+        Stops the worker threads, which release their COM state on the way out, and
+        releases that of the calling thread.
+        """
+        for _ in self.workers:
+            self.tasks.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+        _release_shell()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def report(self) -> list[str]:
+        """
+        Returns one line per category: links written, time taken and links per second.
+        """
+        lines = []
+        for category, (count, seconds) in self.stats.items():
+            rate = count / seconds if seconds > 0 else 0.0
+            lines.append(f"{category}: {count} links in {seconds:.2f}s ({rate:.0f}/s)")
+        return lines
@@ -0,0 +1,204 @@
+"""
+Minimal reader and writer for Windows shell link (.lnk) files, following the
+[MS-SHLLINK] specification. Written in pure Python so shortcuts can be created
+without COM automation or pywin32, on any platform.
+"""
+import ntpath
+import os
+import struct
+import uuid
+from pathlib import Path
+
+HEADER_SIZE = 0x4C
+LINK_CLSID = uuid.UUID("00021401-0000-0000-c000-000000000046").bytes_le
+
+# LinkFlags
+HAS_LINK_TARGET_ID_LIST = 0x01
+HAS_LINK_INFO = 0x02
+HAS_NAME = 0x04
+HAS_RELATIVE_PATH = 0x08
+HAS_WORKING_DIR = 0x10
+IS_UNICODE = 0x80
+
+# LinkInfoFlags
+VOLUME_ID_AND_LOCAL_BASE_PATH = 0x01
+COMMON_NETWORK_RELATIVE_LINK_AND_PATH_SUFFIX = 0x02
+
+FILE_ATTRIBUTE_ARCHIVE = 0x20
+DRIVE_FIXED = 3
+SW_SHOWNORMAL = 1
+FILETIME_EPOCH_OFFSET = 116444736000000000  # 100ns intervals between 1601-01-01 and 1970-01-01
+
+class LnkError(ValueError):
+    """Raised when a file is not a shell link this module can read."""
+
+def _filetime(ns: int) -> int:
+    return FILETIME_EPOCH_OFFSET + ns // 100 if ns else 0
+
+def _cstring(text: str) -> bytes:
+    return text.encode("mbcs" if os.name == "nt" else "cp1252", errors="replace") + b"\0"
+
+def _wstring(text: str) -> bytes:
+    return text.encode("utf-16-le") + b"\0\0"
+
+def _string_data(text: str) -> bytes:
+    encoded = text.encode("utf-16-le")
+    return struct.pack("<H", len(encoded) // 2) + encoded
+
+def _link_info(target: str) -> bytes:
+    # The Unicode fields (header size 0x24) carry names outside the ANSI code page.
+    header_size = 0x24
+    if target.startswith("\\\\"):
+        # UNC path: \\server\share goes into the network link, the rest is the suffix
+        parts = target[2:].split("\\", 2)
+        net_name = "\\\\" + "\\".join(parts[:2])
+        suffix = parts[2] if len(parts) > 2 else ""
+        net_name_bytes = _cstring(net_name)
+        network_header_size = 0x1C  # with NetNameOffsetUnicode and DeviceNameOffsetUnicode
+        net_name_unicode_offset = network_header_size + len(net_name_bytes)
+        network_body = net_name_bytes + _wstring(net_name)
+        network = struct.pack("<IIIIIII", network_header_size + len(network_body), 0, network_header_size, 0, 0,
+                              net_name_unicode_offset, 0) + network_body
+        network_offset = header_size
+        suffix_offset = network_offset + len(network)
+        suffix_bytes = _cstring(suffix)
+        suffix_unicode_offset = suffix_offset + len(suffix_bytes)
+        body = network + suffix_bytes + _wstring(suffix)
+        return struct.pack("<IIIIIIIII", header_size + len(body), header_size,
+                           COMMON_NETWORK_RELATIVE_LINK_AND_PATH_SUFFIX, 0, 0,
+                           network_offset, suffix_offset, 0, suffix_unicode_offset) + body
+
+    # Local path
+    volume_id = struct.pack("<IIII", 0x11, DRIVE_FIXED, 0, 0x10) + b"\0"
+    volume_offset = header_size
+    base_offset = volume_offset + len(volume_id)
+    base = _cstring(target)
+    suffix_offset = base_offset + len(base)
+    base_unicode_offset = suffix_offset + 1
+    base_unicode = _wstring(target)
+    suffix_unicode_offset = base_unicode_offset + len(base_unicode)
+    body = volume_id + base + b"\0" + base_unicode + b"\0\0"
+    return struct.pack("<IIIIIIIII", header_size + len(body), header_size, VOLUME_ID_AND_LOCAL_BASE_PATH,
+                       volume_offset, base_offset, 0, suffix_offset,
+                       base_unicode_offset, suffix_unicode_offset) + body
+
+def build_lnk(target: str, working_dir: str | None = None, relative_path: str | None = None,
+              size: int = 0, times: tuple[int, int, int] = (0, 0, 0)) -> bytes:
+    """
+    Builds the bytes of a shell link to the file target (an absolute Windows path).
+
+    Parameters:
+    target (str): Absolute path of the target, a drive path or a UNC path.
+    working_dir (str | None): Working directory stored in the link.
+    relative_path (str | None): Path of the target relative to the link, used by Windows
+        when the absolute path no longer resolves.
+    size (int): Size of the target in bytes.
+    times (tuple): Creation, access and write time of the target in nanoseconds since the epoch.
+    """
+    flags = HAS_LINK_INFO | IS_UNICODE
+    string_data = b""
+    if relative_path:
+        flags |= HAS_RELATIVE_PATH
+        string_data += _string_data(relative_path)
+    if working_dir:
+        flags |= HAS_WORKING_DIR
+        string_data += _string_data(working_dir)
+    header = struct.pack(
+        "<I16sIIQQQIIIHHII", HEADER_SIZE, LINK_CLSID, flags, FILE_ATTRIBUTE_ARCHIVE,
+        *(_filetime(t) for t in times), size & 0xFFFFFFFF, 0, SW_SHOWNORMAL, 0, 0, 0, 0)
+    # The trailing zero is the terminal block of the (empty) ExtraData section.
+    return header + _link_info(target) + string_data + struct.pack("<I", 0)
+
+def write_lnk(target: Path, shortcut_path: Path) -> None:
+    """
+    Writes a .lnk shortcut to target at shortcut_path, with the target's folder as working
+    directory and a relative path as fallback for when the tree is moved.
+    """
+    target_str = str(target)
+    try:
+        stat = os.stat(target)
+        size, times = stat.st_size, (stat.st_ctime_ns, stat.st_atime_ns, stat.st_mtime_ns)
+    except OSError:
+        size, times = 0, (0, 0, 0)
+    relative_path = None
+    if os.name == "nt":
+        try:
+            relative_path = ntpath.relpath(target_str, ntpath.dirname(str(shortcut_path)))
+        except ValueError:
+            pass  # on another drive
+    data = build_lnk(target_str, ntpath.dirname(target_str), relative_path, size, times)
+    with open(shortcut_path, "wb") as f:
+        f.write(data)
+
+def _read_cstring(data: bytes, offset: int) -> str:
+    end = data.index(b"\0", offset)
+    return data[offset:end].decode("mbcs" if os.name == "nt" else "cp1252", errors="replace")
+
+def _read_wstring(data: bytes, offset: int) -> str:
+    end = offset
+    while data[end:end + 2] != b"\0\0":
+        if end + 2 > len(data):
+            raise ValueError("unterminated string")
+        end += 2
+    return data[offset:end].decode("utf-16-le")
+
+def parse_lnk(data: bytes) -> str:
+    """
+    Returns the target path stored in the LinkInfo of a shell link.
+
+    Raises:
+    LnkError: If data is not a shell link or has no LinkInfo.
+    """
+    if len(data) < HEADER_SIZE or data[:4] != struct.pack("<I", HEADER_SIZE) or data[4:20] != LINK_CLSID:
+        raise LnkError("Not a shell link")
+    flags = struct.unpack_from("<I", data, 20)[0]
+    offset = HEADER_SIZE
+    try:
+        if flags & HAS_LINK_TARGET_ID_LIST:
+            offset += 2 + struct.unpack_from("<H", data, offset)[0]
+        if not flags & HAS_LINK_INFO:
+            raise LnkError("Shell link has no LinkInfo")
+        (size, header_size, info_flags, _volume_offset, base_offset,
+         network_offset, suffix_offset) = struct.unpack_from("<IIIIIII", data, offset)
+        info = data[offset:offset + size]
+        unicode = header_size >= 0x24
+        if unicode:
+            base_unicode_offset, suffix_unicode_offset = struct.unpack_from("<II", info, 0x1C)
+        if unicode and suffix_unicode_offset:
+            suffix = _read_wstring(info, suffix_unicode_offset)
+        else:
+            suffix = _read_cstring(info, suffix_offset)
+        if info_flags & VOLUME_ID_AND_LOCAL_BASE_PATH:
+            if unicode and base_unicode_offset:
+                base = _read_wstring(info, base_unicode_offset)
+            else:
+                base = _read_cstring(info, base_offset)
+        elif info_flags & COMMON_NETWORK_RELATIVE_LINK_AND_PATH_SUFFIX:
+            net_name_offset = struct.unpack_from("<I", info, network_offset + 8)[0]
+            net_name_unicode_offset = 0
+            if net_name_offset > 0x14:
+                net_name_unicode_offset = struct.unpack_from("<I", info, network_offset + 0x14)[0]
+            if net_name_unicode_offset:
+                base = _read_wstring(info, network_offset + net_name_unicode_offset)
+            else:
+                base = _read_cstring(info, network_offset + net_name_offset)
+            if suffix:
+                base += "\\"
+        else:
+            raise LnkError("Shell link has no target path")
+    except LnkError:
+        raise
+    except (struct.error, ValueError) as e:
+        raise LnkError(f"Corrupt shell link: {e}") from e
+    return base + suffix
+
+def read_lnk(shortcut_path: Path) -> str:
+    """
+    Reads the target path of the .lnk file at shortcut_path.
+
+    Raises:
+    LnkError: If the file is not a shell link this module can read.
+    OSError: If the file cannot be read.
+    """
+    with open(shortcut_path, "rb") as f:
+        return parse_lnk(f.read())
@@ -3,10 +3,18 @@ import os
 import sys
 import json
 import logging
-from mover import move_movies
-from fetcher import fetch_movie_data
-from categorizer import create_shortcuts_and_categorize
+from contextlib import nullcontext
+from mover import move_movies, DEFAULT_MOVE_JOBS
+from fetcher import fetch_movie_data, DEFAULT_FETCH_JOBS, DEFAULT_FETCH_RATE
+from categorizer import create_shortcuts_and_categorize, DEFAULT_CATEGORY_OUTPUT
+from linkwriter import DEFAULT_LINK_JOBS, DEFAULT_LINK_STRATEGY
+from dimensions import DEFAULT_SHARDING, category_folders
+from planner import Plan, plan_move, plan_category_sync, apply_plan
 from stats import collect_stats, load_stats
+from cache import ResponseCache, DEFAULT_CACHE_TTL_DAYS, DEFAULT_CACHE_MAX_ENTRIES
+from scheduler import FetchScheduler, DEFAULT_DAILY_LIMIT
+from imdb_index import ImdbIndex
+from catalog import CatalogStore, catalog_exists, catalog_path, open_catalog, DEFAULT_PROFILE
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -15,6 +23,8 @@ logger = logging.getLogger(__name__)
 # Load configuration from JSON
 CONFIG_FILE = Path("app_data/config.json")
 STATS_FILE = Path("app_data/stats.json")
+CACHE_FILE = Path("app_data/omdb_cache.db")
+QUOTA_FILE = Path("app_data/omdb_quota.json")
 
 def get_appdata_path():
     """ پیدا کردن مسیر صحیح و ساخت خودکار app_data در اولین اجرا """
@@ -47,9 +57,28 @@ JSON_FILE = Path(config.get("JSON_FILE"))
 CATEGORIZED_DIR = Path(config.get("CATEGORIZED_DIR"))
 OMDB_API_KEY = config.get("OMDB_API_KEY", "71c04fc1")  # Default API key remains unchanged
 FETCH_TYPE = config.get("FETCH_TYPE", 1)
+FETCH_JOBS = config.get("FETCH_JOBS", DEFAULT_FETCH_JOBS)
+FETCH_RATE = config.get("FETCH_RATE", DEFAULT_FETCH_RATE)
+CACHE_TTL_DAYS = config.get("CACHE_TTL_DAYS", DEFAULT_CACHE_TTL_DAYS)
+CACHE_MAX_ENTRIES = config.get("CACHE_MAX_ENTRIES", DEFAULT_CACHE_MAX_ENTRIES)
+OMDB_DAILY_LIMIT = config.get("OMDB_DAILY_LIMIT", DEFAULT_DAILY_LIMIT)
+IMDB_INDEX_FILE = config.get("IMDB_INDEX_FILE", "")
+IMDB_FULL_DETAILS = config.get("IMDB_FULL_DETAILS", False)
+EXPORT_JSON = config.get("EXPORT_JSON", False)
+CATALOG_PROFILE = config.get("CATALOG_PROFILE", DEFAULT_PROFILE)
+LINK_JOBS = config.get("LINK_JOBS", DEFAULT_LINK_JOBS)
+LINK_STRATEGY = config.get("LINK_STRATEGY", DEFAULT_LINK_STRATEGY)
+STAGED_CATEGORIZE = config.get("STAGED_CATEGORIZE", False)
+CATEGORY_SHARDING = config.get("CATEGORY_SHARDING", DEFAULT_SHARDING)
+CATEGORY_STABLE_NAMES = config.get("CATEGORY_STABLE_NAMES", False)
+CATEGORY_OUTPUT = config.get("CATEGORY_OUTPUT", DEFAULT_CATEGORY_OUTPUT)
+MOVE_JOBS = config.get("MOVE_JOBS", DEFAULT_MOVE_JOBS)
 
 def reload_config():
-    global SOURCE_MOVIES, ALL_MOVIES, JSON_FILE, CATEGORIZED_DIR, OMDB_API_KEY, FETCH_TYPE
+    global SOURCE_MOVIES, ALL_MOVIES, JSON_FILE, CATEGORIZED_DIR, OMDB_API_KEY, FETCH_TYPE, FETCH_JOBS, FETCH_RATE
+    global CACHE_TTL_DAYS, CACHE_MAX_ENTRIES, OMDB_DAILY_LIMIT, IMDB_INDEX_FILE, IMDB_FULL_DETAILS
+    global EXPORT_JSON, CATALOG_PROFILE, LINK_JOBS, LINK_STRATEGY, STAGED_CATEGORIZE
+    global CATEGORY_SHARDING, CATEGORY_STABLE_NAMES, CATEGORY_OUTPUT, MOVE_JOBS
     config = load_config()
     SOURCE_MOVIES = Path(config.get("SOURCE_MOVIES"))
     ALL_MOVIES = Path(config.get("ALL_MOVIES"))
@@ -57,15 +86,77 @@ def reload_config():
     CATEGORIZED_DIR = Path(config.get("CATEGORIZED_DIR"))
     OMDB_API_KEY = config.get("OMDB_API_KEY", "71c04fc1")
     FETCH_TYPE = config.get("FETCH_TYPE", 1)
+    FETCH_JOBS = config.get("FETCH_JOBS", DEFAULT_FETCH_JOBS)
+    FETCH_RATE = config.get("FETCH_RATE", DEFAULT_FETCH_RATE)
+    CACHE_TTL_DAYS = config.get("CACHE_TTL_DAYS", DEFAULT_CACHE_TTL_DAYS)
+    CACHE_MAX_ENTRIES = config.get("CACHE_MAX_ENTRIES", DEFAULT_CACHE_MAX_ENTRIES)
+    OMDB_DAILY_LIMIT = config.get("OMDB_DAILY_LIMIT", DEFAULT_DAILY_LIMIT)
+    IMDB_INDEX_FILE = config.get("IMDB_INDEX_FILE", "")
+    IMDB_FULL_DETAILS = config.get("IMDB_FULL_DETAILS", False)
+    EXPORT_JSON = config.get("EXPORT_JSON", False)
+    CATALOG_PROFILE = config.get("CATALOG_PROFILE", DEFAULT_PROFILE)
+    LINK_JOBS = config.get("LINK_JOBS", DEFAULT_LINK_JOBS)
+    LINK_STRATEGY = config.get("LINK_STRATEGY", DEFAULT_LINK_STRATEGY)
+    STAGED_CATEGORIZE = config.get("STAGED_CATEGORIZE", False)
+    CATEGORY_SHARDING = config.get("CATEGORY_SHARDING", DEFAULT_SHARDING)
+    CATEGORY_STABLE_NAMES = config.get("CATEGORY_STABLE_NAMES", False)
+    CATEGORY_OUTPUT = config.get("CATEGORY_OUTPUT", DEFAULT_CATEGORY_OUTPUT)
+    MOVE_JOBS = config.get("MOVE_JOBS", DEFAULT_MOVE_JOBS)
+
+def open_response_cache():
+    """
+    Opens the OMDb response cache with the configured TTL and size limit.
+    """
+    return ResponseCache(CACHE_FILE, CACHE_TTL_DAYS, CACHE_MAX_ENTRIES)
+
+def open_fetch_scheduler(api_key=None):
+    """
+    Opens the daily OMDb budget tracker for api_key (the configured key by default).
+    """
+    return FetchScheduler(QUOTA_FILE, api_key or OMDB_API_KEY, OMDB_DAILY_LIMIT)
+
+def open_imdb_index():
+    """
+    Opens the offline IMDb index if one is configured and has been built, otherwise returns None.
+    """
+    if IMDB_INDEX_FILE and Path(IMDB_INDEX_FILE).exists():
+        return ImdbIndex(Path(IMDB_INDEX_FILE))
+    return None
+
+def get_remaining_quota(api_key=None):
+    """
+    Returns the number of OMDb requests left today for api_key.
+    """
+    return open_fetch_scheduler(api_key).remaining()
+
+def import_movie_data(json_file=None):
+    """
+    Imports a movie_data.json file (JSON_FILE by default) into the movie catalog.
+    
+    Returns:
+    int: The number of records imported
+    """
+    with CatalogStore(catalog_path(JSON_FILE), CATALOG_PROFILE) as store:
+        return store.import_json(Path(json_file) if json_file else JSON_FILE)
+
+def export_movie_data(json_file=None):
+    """
+    Exports the movie catalog to a movie_data.json file (JSON_FILE by default).
+    
+    Returns:
+    int: The number of records exported
+    """
+    with open_catalog(JSON_FILE, CATALOG_PROFILE) as store:
+        return store.export_json(Path(json_file) if json_file else JSON_FILE)
 
 def reload_stats():
     """
-    Reloads the movie statistics from the JSON data and updates the stats file.
+    Reloads the movie statistics from the movie catalog and updates the stats file.
     
     Returns:
     dict: The updated statistics
     """
-    return collect_stats(JSON_FILE, STATS_FILE)
+    return collect_stats(JSON_FILE, STATS_FILE, CATALOG_PROFILE)
 
 def get_stats():
     """
@@ -76,28 +167,34 @@ def get_stats():
     """
     stats = load_stats(STATS_FILE)
     
-    if stats.get("movies", 0) == 0 and JSON_FILE.exists():
+    if stats.get("movies", 0) == 0 and catalog_exists(JSON_FILE):
         stats = reload_stats()
     return stats
 
 def main():
     try:
         print("Moving movie files...")
-        move_movies(SOURCE_MOVIES, ALL_MOVIES)
+        move_movies(SOURCE_MOVIES, ALL_MOVIES, MOVE_JOBS)
     except Exception as e:
         print(f"Error moving movies: {e}")
         logger.error(f"Error moving movies: {e}")
 
     try:
         print("Fetching movie data...")
-        fetch_movie_data(ALL_MOVIES, JSON_FILE, OMDB_API_KEY, False)
+        with open_response_cache() as cache, (open_imdb_index() or nullcontext()) as imdb_index:
+            fetch_movie_data(ALL_MOVIES, JSON_FILE, OMDB_API_KEY, False, FETCH_JOBS, FETCH_RATE, cache,
+                             open_fetch_scheduler(), imdb_index, IMDB_FULL_DETAILS, EXPORT_JSON,
+                             CATALOG_PROFILE, category_folders(CATEGORIZED_DIR))
     except Exception as e:
         print(f"Error fetching movie data: {e}")
         logger.error(f"Error fetching movie data: {e}")
 
     try:
         print("Creating shortcuts and categorizing movies...")
-        create_shortcuts_and_categorize(ALL_MOVIES, JSON_FILE, CATEGORIZED_DIR, True, True, True)
+        create_shortcuts_and_categorize(ALL_MOVIES, JSON_FILE, CATEGORIZED_DIR, True, True, True, LINK_JOBS,
+                                        LINK_STRATEGY, staged=STAGED_CATEGORIZE,
+                                        sharding=CATEGORY_SHARDING, stable_names=CATEGORY_STABLE_NAMES,
+                                        output=CATEGORY_OUTPUT, profile=CATALOG_PROFILE)
     except Exception as e:
         print(f"Error creating shortcuts and categorizing movies: {e}")
         logger.error(f"Error creating shortcuts and categorizing movies: {e}")
@@ -110,17 +207,52 @@ def main():
 
 def main_move_movies():
     print(f"Moving movies from {SOURCE_MOVIES} to {ALL_MOVIES}")
-    move_movies(SOURCE_MOVIES, ALL_MOVIES)
+    move_movies(SOURCE_MOVIES, ALL_MOVIES, MOVE_JOBS)
     reload_stats()
 
-def main_fetch_movie_info(fetch_all):
-    print(f"Fetching movie info using API Key: {OMDB_API_KEY}")
-    fetch_movie_data(ALL_MOVIES, JSON_FILE, OMDB_API_KEY, fetch_all)
+def main_fetch_movie_info(fetch_all, jobs=None):
+    jobs = jobs or FETCH_JOBS
+    print(f"Fetching movie info using API Key: {OMDB_API_KEY} ({jobs} parallel requests)")
+    with open_response_cache() as cache, (open_imdb_index() or nullcontext()) as imdb_index:
+        fetch_movie_data(ALL_MOVIES, JSON_FILE, OMDB_API_KEY, fetch_all, jobs, FETCH_RATE, cache,
+                         open_fetch_scheduler(), imdb_index, IMDB_FULL_DETAILS, EXPORT_JSON,
+                         CATALOG_PROFILE, category_folders(CATEGORIZED_DIR))
+    reload_stats()
+
+def plan_move_movies():
+    """
+    Plans moving the movies from SOURCE_MOVIES to ALL_MOVIES without moving anything.
+    
+    Returns:
+    Plan: The operations that main_move_movies would run
+    """
+    return plan_move(SOURCE_MOVIES, ALL_MOVIES, MOVE_JOBS)
+
+def plan_categorize_movies(director, imdb, decade, extra_categories=()):
+    """
+    Plans syncing the category tree in CATEGORIZED_DIR without changing it.
+    
+    Returns:
+    Plan: The operations that main_categorize_movies would run
+    """
+    if CATEGORY_OUTPUT != "links":
+        raise ValueError(f"Dry runs are only available for the links category output, not {CATEGORY_OUTPUT}")
+    return plan_category_sync(ALL_MOVIES, JSON_FILE, CATEGORIZED_DIR, director, imdb, decade, LINK_JOBS,
+                              LINK_STRATEGY, extra_categories, STAGED_CATEGORIZE, CATEGORY_SHARDING,
+                              CATEGORY_STABLE_NAMES)
+
+def apply_saved_plan(plan_file):
+    """
+    Runs a plan saved by a dry run.
+    """
+    apply_plan(Plan.load(plan_file))
     reload_stats()
 
-def main_categorize_movies(director, imdb, decade):
+def main_categorize_movies(director, imdb, decade, extra_categories=()):
     print(f"Categorizing movies into {CATEGORIZED_DIR}")
-    create_shortcuts_and_categorize(ALL_MOVIES, JSON_FILE, CATEGORIZED_DIR, director, imdb, decade)
+    create_shortcuts_and_categorize(ALL_MOVIES, JSON_FILE, CATEGORIZED_DIR, director, imdb, decade, LINK_JOBS,
+                                    LINK_STRATEGY, extra_categories, STAGED_CATEGORIZE, CATEGORY_SHARDING,
+                                    CATEGORY_STABLE_NAMES, CATEGORY_OUTPUT, CATALOG_PROFILE)
     reload_stats()
 
 if __name__ == "__main__":
@@ -1,34 +1,253 @@
+import errno
 import os
 import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import NamedTuple
 from utils import sanitize_folder_name, parse_movie_filename
+from scanner import scan_video_files
 
-def move_movies(source_folder: Path, destination_folder: Path) -> None:
+DEFAULT_MOVE_JOBS = 2  # parallel copies per pair of devices; more mostly makes hard disks seek
+COPY_CHUNK = 64 * 1024 * 1024  # bytes per copy_file_range/sendfile call
+COPY_BUFFER = 8 * 1024 * 1024  # buffer for plain read/write copying
+
+class MoveOp(NamedTuple):
+    """
+    One step of moving movies. kind is "mkdir" (path is the folder to create), "rename"
+    (path is moved to target on the same volume) or "copy" (path is on another volume than
+    target, so it is copied and then deleted); size is the file size in bytes.
+    """
+    kind: str
+    path: Path
+    target: Path | None = None
+    size: int = 0
+
+def _device(path: Path) -> int | None:
+    # Device of path, or of its nearest existing parent when it does not exist yet
+    for candidate in (path, *path.parents):
+        try:
+            return os.stat(candidate).st_dev
+        except OSError:
+            continue
+    return None
+
+def plan_moves(source_folder: Path, destination_folder: Path) -> list[MoveOp]:
+    """
+    Works out how move_movies would move the movie files from source_folder to
+    destination_folder, without changing anything on disk.
+    Each movie file is placed in its own folder named after its sanitized title; a name
+    already taken gets a counter suffix ("Movie_1.mkv").
+
+    Returns:
+    list[MoveOp]: The steps, in the order they have to be applied.
+    """
+    destination_folder = Path(destination_folder)
+    dest_device = _device(destination_folder)
+    ops = []
+    planned_dirs = set()
+    taken = set()
+    if not destination_folder.exists():
+        ops.append(MoveOp("mkdir", destination_folder))
+        planned_dirs.add(destination_folder)
+    # Collect the files up front so moved files are never picked up again by the scan.
+    for entry in list(scan_video_files(source_folder)):
+        file = entry.name
+        src_path = Path(entry.path)
+        title, _ = parse_movie_filename(file)
+        safe_folder_name = sanitize_folder_name(title)
+        new_dest_folder = destination_folder / safe_folder_name
+        if new_dest_folder not in planned_dirs and not new_dest_folder.exists():
+            ops.append(MoveOp("mkdir", new_dest_folder))
+            planned_dirs.add(new_dest_folder)
+        dest_path = new_dest_folder / file
+
+        base = Path(file).stem
+        ext = Path(file).suffix
+        counter = 1
+        while dest_path in taken or dest_path.exists():
+            new_file_name = f"{base}_{counter}{ext}"
+            dest_path = new_dest_folder / new_file_name
+            counter += 1
+        taken.add(dest_path)
+
+        try:
+            stat = entry.stat()
+            kind = "rename" if stat.st_dev == dest_device else "copy"
+            size = stat.st_size
+        except OSError:
+            kind, size = "copy", 0
+        ops.append(MoveOp(kind, src_path, dest_path, size))
+    return ops
+
+def _copy_data(src, dst) -> None:
+    # Kernel-side copying where available (copy_file_range, then sendfile), else large buffers
+    size = os.fstat(src.fileno()).st_size
+    for kernel_copy in ("copy_file_range", "sendfile"):
+        func = getattr(os, kernel_copy, None)
+        if func is None:
+            continue
+        offset = 0
+        try:
+            while offset < size:
+                if kernel_copy == "copy_file_range":
+                    sent = func(src.fileno(), dst.fileno(), min(size - offset, COPY_CHUNK), offset, offset)
+                else:
+                    sent = func(dst.fileno(), src.fileno(), offset, min(size - offset, COPY_CHUNK))
+                if sent == 0:
+                    break
+                offset += sent
+            if offset == size:
+                return
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP,
+                               errno.EBADF, errno.ENOTSOCK):
+                raise
+        # Not supported for this pair of file systems: start over with the next method
+        src.seek(0)
+        dst.seek(0)
+        dst.truncate()
+    buffer = bytearray(COPY_BUFFER)
+    view = memoryview(buffer)
+    while True:
+        read = src.readinto(buffer)
+        if not read:
+            break
+        dst.write(view[:read])
+
+def copy_and_remove(src_path: Path, dest_path: Path) -> int:
+    """
+    Moves src_path to dest_path on another volume: the data is copied to a temporary
+    file next to dest_path, which is renamed into place once complete, and only then is
+    src_path removed. An interrupted copy never leaves a partial movie behind.
+
+    Returns:
+    int: The number of bytes copied.
+    """
+    tmp_path = dest_path.with_name(dest_path.name + ".part")
+    try:
+        with open(src_path, "rb") as src, open(tmp_path, "wb") as dst:
+            _copy_data(src, dst)
+            size = os.fstat(dst.fileno()).st_size
+        shutil.copystat(src_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.unlink(src_path)
+    return size
+
+class MoveReport:
+    """
+    Files and bytes copied per pair of devices, with the time spent, for throughput
+    reporting, and the number of files renamed within a device.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.renamed = 0
+        self.stats = {}
+        self.started = {}
+
+    def start(self, pair: str) -> None:
+        with self.lock:
+            self.started.setdefault(pair, time.perf_counter())
+
+    def add(self, pair: str, size: int) -> None:
+        with self.lock:
+            files, total, _ = self.stats.get(pair, (0, 0, 0.0))
+            self.stats[pair] = (files + 1, total + size, time.perf_counter() - self.started[pair])
+
+    def report(self) -> list[str]:
+        """
+        Returns one line per device pair: files, bytes, time taken and throughput.
+        """
+        lines = [f"renamed: {self.renamed} files (no data copied)"] if self.renamed else []
+        for pair, (files, total, seconds) in self.stats.items():
+            rate = total / seconds / 1024 / 1024 if seconds > 0 else 0.0
+            lines.append(f"{pair}: {files} files, {total / 1024 / 1024:.1f} MB in {seconds:.2f}s ({rate:.1f} MB/s)")
+        return lines
+
+def _free_destination(target: Path, taken: set[Path]) -> Path:
+    dest_path = target
+    counter = 1
+    while dest_path in taken or dest_path.exists():
+        dest_path = target.with_name(f"{target.stem}_{counter}{target.suffix}")
+        counter += 1
+    taken.add(dest_path)
+    return dest_path
+
+def apply_moves(ops: list[MoveOp], jobs: int = DEFAULT_MOVE_JOBS) -> MoveReport:
+    """
+    Applies the steps from plan_moves. Moves within one device are plain renames, done
+    first. Moves across devices are copied with up to jobs parallel workers per pair of
+    source and destination device, and all device pairs run at the same time, so every
+    disk involved stays busy.
+    A destination taken since the plan was made gets the next free counter suffix instead
+    of being overwritten; files that can no longer be moved are reported and skipped.
+
+    Returns:
+    MoveReport: Throughput per device pair.
+    """
+    report = MoveReport()
+    taken = set()
+    copies = {}
+    for op in ops:
+        if op.kind == "mkdir":
+            op.path.mkdir(parents=True, exist_ok=True)
+            continue
+        dest_path = _free_destination(op.target, taken)
+        try:
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            src_device = os.stat(op.path).st_dev
+            dest_device = os.stat(dest_path.parent).st_dev
+        except OSError as e:
+            print(f"Could not move {op.path}: {e}")
+            continue
+        if src_device == dest_device:
+            print(f"Moving: {op.path} -> {dest_path}")
+            try:
+                os.rename(op.path, dest_path)
+                report.renamed += 1
+                continue
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    print(f"Could not move {op.path}: {e}")
+                    continue
+        copies.setdefault(f"device {src_device} -> {dest_device}", []).append((op.path, dest_path))
+
+    def copy_one(pair: str, src_path: Path, dest_path: Path) -> None:
+        report.start(pair)
+        print(f"Copying: {src_path} -> {dest_path}")
+        start = time.perf_counter()
+        try:
+            size = copy_and_remove(src_path, dest_path)
+        except OSError as e:
+            print(f"Could not move {src_path}: {e}")
+            return
+        report.add(pair, size)
+        seconds = time.perf_counter() - start
+        rate = size / seconds / 1024 / 1024 if seconds > 0 else 0.0
+        print(f"Copied {dest_path.name}: {size / 1024 / 1024:.1f} MB in {seconds:.2f}s ({rate:.1f} MB/s)")
+
+    pools = [ThreadPoolExecutor(max_workers=max(1, min(jobs, len(moves)))) for moves in copies.values()]
+    try:
+        futures = [pool.submit(copy_one, pair, src_path, dest_path)
+                   for pool, (pair, moves) in zip(pools, copies.items()) for src_path, dest_path in moves]
+        for future in futures:
+            future.result()
+    finally:
+        for pool in pools:
+            pool.shutdown()
+    return report
+
+def move_movies(source_folder: Path, destination_folder: Path, jobs: int = DEFAULT_MOVE_JOBS) -> None:
     """
     Moves movie files from source_folder to destination_folder.
     Each movie file is placed in its own folder named after its sanitized title.
+    Files on another device are copied by up to jobs workers per pair of devices.
     """
-    destination_folder.mkdir(parents=True, exist_ok=True)
-    video_extensions = ('.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv')
-    
-    for root, _, files in os.walk(source_folder):
-        for file in files:
-            if file.lower().endswith(video_extensions):
-                src_path = Path(root) / file
-                title, _ = parse_movie_filename(file)
-                safe_folder_name = sanitize_folder_name(title)
-                new_dest_folder = destination_folder / safe_folder_name
-                new_dest_folder.mkdir(parents=True, exist_ok=True)
-                dest_path = new_dest_folder / file
-
-                base = Path(file).stem
-                ext = Path(file).suffix
-                counter = 1
-                while dest_path.exists():
-                    new_file_name = f"{base}_{counter}{ext}"
-                    dest_path = new_dest_folder / new_file_name
-                    counter += 1
-
-                print(f"Moving: {src_path} -> {dest_path}")
-                shutil.move(str(src_path), str(dest_path))
+    report = apply_moves(plan_moves(source_folder, destination_folder), jobs)
+    for line in report.report():
+        print(line)
     print("All movies have been moved.")
@@ -0,0 +1,150 @@
+"""
+Operation plans for the heavy runs, moving movies and syncing the category tree: what
+would be done, with operation counts and byte totals, worked out without changing the
+library. A plan can be printed (dry run), saved as JSON and applied later.
+"""
+import json
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Iterable
+from utils import write_json_atomic
+from mover import MoveOp, plan_moves, apply_moves, DEFAULT_MOVE_JOBS
+from treesync import SyncOp
+from categorizer import plan_categorize, apply_categorize
+from dimensions import DEFAULT_SHARDING
+from linkwriter import DEFAULT_LINK_JOBS, DEFAULT_LINK_STRATEGY, resolve_strategy
+
+PLAN_VERSION = 1
+PLAN_ACTIONS = ("move", "categorize")
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+class Plan:
+    """
+    The operations of one run. action is "move" (ops are mover.MoveOp) or "categorize"
+    (ops are treesync.SyncOp); settings hold what is needed to apply the plan, such as the
+    category folder, link strategy and the rankings of ranked categories. For category
+    syncs, links holds the whole desired tree, which staged syncs rebuild changed category
+    folders from.
+    """
+    def __init__(self, action: str, settings: dict, ops: list, links: dict[Path, Path] | None = None,
+                 created: float | None = None):
+        if action not in PLAN_ACTIONS:
+            raise ValueError(f"Unknown plan action: {action}")
+        self.action = action
+        self.settings = settings
+        self.ops = ops
+        self.links = links
+        self.created = created or time.time()
+
+    def summary(self) -> dict:
+        """
+        Returns the number of operations of every kind and the bytes that would be moved,
+        split into renames (same volume, no data copied) and copies (across volumes).
+        """
+        counts = Counter(op.kind for op in self.ops)
+        copied = sum(op.size for op in self.ops if op.kind == "copy")
+        renamed = sum(op.size for op in self.ops if op.kind == "rename")
+        return {"operations": dict(counts), "total": len(self.ops), "bytes_copied": copied, "bytes_renamed": renamed}
+
+    def describe(self, details: bool = False) -> list[str]:
+        """
+        Returns the plan as printable lines: a summary, and every operation with details.
+        """
+        summary = self.summary()
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(self.created))
+        lines = [f"Plan: {self.action}, {summary['total']} operations (made {when})"]
+        for kind, count in sorted(summary["operations"].items()):
+            lines.append(f"  {kind}: {count}")
+        if self.action == "move":
+            lines.append(f"  data copied across volumes: {format_size(summary['bytes_copied'])}")
+            lines.append(f"  data renamed in place: {format_size(summary['bytes_renamed'])}")
+        if details:
+            for op in self.ops:
+                lines.append(f"{op.kind} {op.path}" + (f" -> {op.target}" if op.target else ""))
+        return lines
+
+    def to_json(self) -> dict:
+        data = {
+            "version": PLAN_VERSION,
+            "action": self.action,
+            "created": self.created,
+            "settings": self.settings,
+            "summary": self.summary(),
+            "ops": [{key: str(value) if isinstance(value, Path) else value for key, value in op._asdict().items()}
+                    for op in self.ops],
+        }
+        if self.links is not None:
+            data["links"] = {path.as_posix(): str(target) for path, target in self.links.items()}
+        return data
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Plan":
+        """
+        Raises:
+        ValueError: If data is not a plan this version can apply.
+        """
+        if data.get("version") != PLAN_VERSION:
+            raise ValueError(f"Unsupported plan version: {data.get('version')}")
+        op_type = MoveOp if data.get("action") == "move" else SyncOp
+        ops = []
+        for op in data.get("ops", []):
+            fields = {key: value for key, value in op.items() if key in op_type._fields}
+            fields["path"] = Path(fields["path"])
+            fields["target"] = Path(fields["target"]) if fields.get("target") else None
+            ops.append(op_type(**fields))
+        links = data.get("links")
+        if links is not None:
+            links = {Path(path): Path(target) for path, target in links.items()}
+        return cls(data.get("action"), data.get("settings", {}), ops, links, data.get("created"))
+
+    def save(self, path: Path) -> None:
+        write_json_atomic(path, self.to_json())
+
+    @classmethod
+    def load(cls, path: Path) -> "Plan":
+        with Path(path).open("r", encoding="utf-8") as f:
+            return cls.from_json(json.load(f))
+
+def plan_move(source_folder: Path, destination_folder: Path, jobs: int = DEFAULT_MOVE_JOBS) -> Plan:
+    """
+    Plans moving the movie files from source_folder to destination_folder (see mover.move_movies).
+    """
+    return Plan("move", {"source": str(source_folder), "destination": str(destination_folder), "jobs": jobs},
+                plan_moves(source_folder, destination_folder))
+
+def plan_category_sync(source_folder: Path, json_file: Path, dest_base: Path, need_director: bool, need_imdb: bool,
+                       need_decade: bool, jobs: int = DEFAULT_LINK_JOBS, strategy: str = DEFAULT_LINK_STRATEGY,
+                       extra_categories: Iterable[str] = (), staged: bool = False,
+                       sharding: str = DEFAULT_SHARDING, stable_names: bool = False) -> Plan:
+    """
+    Plans syncing the category tree in dest_base (see categorizer.create_shortcuts_and_categorize).
+    """
+    strategy = resolve_strategy(strategy)
+    ops, desired, rankings = plan_categorize(source_folder, json_file, dest_base, need_director, need_imdb,
+                                             need_decade, strategy, extra_categories, sharding, stable_names)
+    settings = {"dest_base": str(dest_base), "strategy": strategy, "jobs": jobs, "staged": staged,
+                "stable_names": stable_names, "rankings": rankings}
+    return Plan("categorize", settings, ops, desired)
+
+def apply_plan(plan: Plan) -> None:
+    """
+    Runs the operations of a plan. Plans are applied as they are: changes made to the
+    library since the plan was made are not picked up, and operations that no longer
+    apply are reported and skipped.
+    """
+    if plan.action == "move":
+        report = apply_moves(plan.ops, plan.settings.get("jobs", DEFAULT_MOVE_JOBS))
+        for line in report.report():
+            print(line)
+        print("All movies have been moved.")
+        return
+    settings = plan.settings
+    apply_categorize(Path(settings["dest_base"]), plan.ops, plan.links or {}, settings.get("jobs", DEFAULT_LINK_JOBS),
+                     settings["strategy"], settings.get("staged", False), rankings=settings.get("rankings"))
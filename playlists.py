@@ -0,0 +1,128 @@
+"""
+Playlist output for categories: one M3U8 playlist per category value plus a JSON index
+per category, instead of a tree of folders and links. Only manifests whose content
+changed are rewritten; their hashes are kept in .cinemashelf_playlists.json.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from catalog import MovieRecord
+from dimensions import Dimension
+from utils import write_json_atomic, write_text_atomic
+
+PLAYLIST_STATE_FILE = ".cinemashelf_playlists.json"
+PLAYLIST_SUFFIX = ".m3u8"
+INDEX_FILE = "index.json"
+
+class _RelativePaths:
+    """
+    Paths of movie files relative to a playlist folder. Relative paths keep playlists
+    working when the share is mounted elsewhere. Computed once per pair of folders, as
+    most movies share a few folders and relpath is slow.
+    """
+    def __init__(self):
+        self.prefixes = {}
+
+    def __call__(self, directory: str, name: str, playlist_dir: str) -> str:
+        prefix = self.prefixes.get((directory, playlist_dir))
+        if prefix is None:
+            try:
+                prefix = os.path.join(os.path.relpath(directory, playlist_dir), "")
+            except ValueError:
+                prefix = os.path.join(directory, "")  # on another drive
+            self.prefixes[directory, playlist_dir] = prefix
+        return prefix + name
+
+def _build_playlist(name: str, movies: list[MovieRecord], files: dict[str, tuple[str, str]], playlist_dir: str,
+                    relative: _RelativePaths) -> str:
+    lines = ["#EXTM3U", f"#PLAYLIST:{name}"]
+    for movie in movies:
+        located = files.get(movie.file_name)
+        if not located:
+            continue
+        duration = movie.runtime * 60 if movie.runtime else -1
+        title = f"{movie.title} ({movie.year})" if movie.year else movie.title
+        lines.append(f"#EXTINF:{duration},{title}")
+        lines.append(relative(*located, playlist_dir))
+    return "\n".join(lines) + "\n"
+
+def build_manifests(dest_base: Path, dimensions: list[Dimension], groups: dict[str, dict[str, list[MovieRecord]]],
+                    paths: dict[str, Path | None]) -> dict[Path, str]:
+    """
+    Builds every playlist and index of the given groups (from dimensions.group_movies).
+    Movies without a file in paths are left out, and so are groups without any file.
+
+    Returns:
+    dict[Path, str]: Manifest path relative to dest_base -> content.
+    """
+    relative = _RelativePaths()
+    files = {file_name: os.path.split(str(path)) for file_name, path in paths.items() if path}
+    full_paths = {file_name: str(path) for file_name, path in paths.items() if path}
+    manifests = {}
+    for dimension in dimensions:
+        index = []
+        for rank, (group, movies) in enumerate(groups[dimension.name].items(), 1):
+            if not any(movie.file_name in files for movie in movies):
+                continue  # no files to play
+            playlist = Path(dimension.folder, group + PLAYLIST_SUFFIX)
+            name = playlist.stem
+            manifests[playlist] = _build_playlist(name, movies, files, str(Path(dest_base) / playlist.parent), relative)
+            entry = {"name": name, "playlist": Path(group + PLAYLIST_SUFFIX).as_posix()}
+            if dimension.ranked:
+                entry["rank"] = rank
+            entry["movies"] = [{"title": movie.title, "year": movie.year, "imdb_id": movie.imdb_id,
+                                "file": full_paths[movie.file_name]}
+                               for movie in movies if movie.file_name in full_paths]
+            index.append(entry)
+        # Compact, so the C encoder is used: the index of a large collection has millions of values
+        manifests[Path(dimension.folder, INDEX_FILE)] = json.dumps(
+            {"category": dimension.label, "groups": index}, ensure_ascii=False)
+    return manifests
+
+def _load_state(dest_base: Path) -> dict[str, str]:
+    try:
+        with (dest_base / PLAYLIST_STATE_FILE).open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def write_manifests(dest_base: Path, roots: list[str], manifests: dict[Path, str]) -> tuple[int, int, int]:
+    """
+    Writes the manifests that changed since the last run and removes the ones of the
+    given category roots that are no longer produced.
+
+    Returns:
+    tuple[int, int, int]: (written, removed, unchanged)
+    """
+    dest_base = Path(dest_base)
+    state = _load_state(dest_base)
+    written = unchanged = 0
+    new_state = {key: value for key, value in state.items() if Path(key).parts[0] not in roots}
+    for path, content in manifests.items():
+        key = path.as_posix()
+        digest = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        new_state[key] = digest
+        if state.get(key) == digest and (dest_base / path).exists():
+            unchanged += 1
+            continue
+        write_text_atomic(dest_base / path, content)
+        written += 1
+
+    removed = 0
+    for key in state:
+        if key in new_state or Path(key).parts[0] not in roots:
+            continue
+        path = dest_base / key
+        path.unlink(missing_ok=True)
+        removed += 1
+        # Drop shard folders left empty, up to the category root
+        parent = path.parent
+        while parent != dest_base / Path(key).parts[0]:
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+            parent = parent.parent
+    write_json_atomic(dest_base / PLAYLIST_STATE_FILE, new_state, indent=None)
+    return written, removed, unchanged
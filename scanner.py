@@ -0,0 +1,179 @@
+import json
+import os
+import re
+from pathlib import Path
+from typing import Iterable, Iterator
+from utils import write_json_atomic
+
+VIDEO_EXTENSIONS = frozenset({'.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv'})
+IMDB_ID_PATTERN = re.compile(r'(?<![a-z0-9])(tt\d{7,9})(?!\d)', re.IGNORECASE)
+NFO_READ_LIMIT = 64 * 1024
+FILE_INDEX_VERSION = 2  # bumped when the rules for what is indexed change
+APP_DIR_PREFIX = ".cinemashelf_"  # staging and trash folders of the category sync
+
+def is_video_file(file_name: str) -> bool:
+    """
+    Checks whether file_name has one of the supported video extensions.
+    """
+    return os.path.splitext(file_name)[1].lower() in VIDEO_EXTENSIONS
+
+def _excluded_dirs(exclude: Iterable[Path]) -> set[str]:
+    return {os.path.normcase(os.path.abspath(path)) for path in exclude}
+
+def _skip_directory(path: str, excluded: set[str]) -> bool:
+    # Category links (the category folder, its staging and trash folders) are not movies
+    return (os.path.basename(path).startswith(APP_DIR_PREFIX)
+            or bool(excluded) and os.path.normcase(os.path.abspath(path)) in excluded)
+
+def _is_video_entry(entry: os.DirEntry) -> bool:
+    # Symbolic links are skipped: category links keep the movie's extension
+    return not entry.is_symlink() and entry.is_file(follow_symlinks=False) and is_video_file(entry.name)
+
+def scan_video_files(folder: Path, exclude: Iterable[Path] = ()) -> Iterator[os.DirEntry]:
+    """
+    Lazily yields an os.DirEntry for every video file in folder and its subdirectories.
+    Files of a directory are yielded before its subdirectories are entered. The entries
+    carry the stat information os.scandir already collected, and the first results are
+    available before the rest of the tree has been read.
+    Directories that cannot be read are skipped, and so are symbolic links, the folders
+    in exclude (e.g. the category folder, whose hard links look like movie files) and
+    the .cinemashelf_* folders.
+    """
+    excluded = _excluded_dirs(exclude)
+    stack = [os.fspath(folder)]
+    while stack:
+        directory = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not _skip_directory(entry.path, excluded):
+                                subdirs.append(entry.path)
+                        elif _is_video_entry(entry):
+                            yield entry
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        stack.extend(reversed(subdirs))
+
+class FileIndex:
+    """
+    Maps video file names to their paths, built from one scan of a folder tree.
+    File names that occur more than once are kept as duplicates, in scan order.
+    """
+    def __init__(self, root: Path, paths: dict[str, list[str]]):
+        self.root = Path(root)
+        self.paths = paths
+
+    def find(self, file_name: str) -> Path | None:
+        """
+        Returns the path of file_name, or None if it is not in the tree. For a duplicate
+        name the first path in scan order is returned; see duplicates().
+        """
+        paths = self.paths.get(file_name)
+        return Path(paths[0]) if paths else None
+
+    def duplicates(self) -> dict[str, list[str]]:
+        """
+        Returns every file name that occurs more than once, with all of its paths.
+        """
+        return {name: paths for name, paths in self.paths.items() if len(paths) > 1}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+def _read_directory(directory: str) -> tuple[list[str], list[str]]:
+    files = []
+    subdirs = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif _is_video_entry(entry):
+                    files.append(entry.name)
+            except OSError:
+                continue
+    return files, subdirs
+
+def index_video_files(folder: Path, cache_file: Path | None = None, exclude: Iterable[Path] = (),
+                      update_cache: bool = True) -> FileIndex:
+    """
+    Indexes every video file in folder and its subdirectories by file name.
+
+    With cache_file, the listing of every directory is saved together with the
+    directory's modification time. On the next run a directory whose mtime did not
+    change is taken from the cache with a single stat instead of being listed again,
+    since adding, removing or renaming an entry always updates the mtime of its parent.
+
+    Parameters:
+    folder (Path): The folder to index.
+    cache_file (Path | None): Where to persist the directory listings between runs.
+    exclude (Iterable[Path]): Folders to leave out, as in scan_video_files.
+    update_cache (bool): Save the listings to cache_file; without it the cache is only read.
+
+    Returns:
+    FileIndex: The index of the tree.
+    """
+    root = os.fspath(folder)
+    cached = {}
+    if cache_file and Path(cache_file).exists():
+        try:
+            with Path(cache_file).open("r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("root") == root and state.get("version") == FILE_INDEX_VERSION:
+                cached = state.get("dirs", {})
+        except (json.JSONDecodeError, AttributeError):
+            cached = {}
+
+    excluded = _excluded_dirs(exclude)
+    dirs = {}
+    paths = {}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        if directory != root and _skip_directory(directory, excluded):
+            continue
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+            listing = cached.get(directory)
+            if listing is None or listing[0] != mtime:
+                listing = [mtime, *_read_directory(directory)]
+        except OSError:
+            continue
+        dirs[directory] = listing
+        for name in listing[1]:
+            paths.setdefault(name, []).append(os.path.join(directory, name))
+        stack.extend(os.path.join(directory, name) for name in reversed(listing[2]))
+
+    if cache_file and update_cache:
+        write_json_atomic(Path(cache_file), {"version": FILE_INDEX_VERSION, "root": root, "dirs": dirs}, indent=None)
+    return FileIndex(Path(root), paths)
+
+def extract_imdb_id(text: str) -> str | None:
+    """
+    Returns the first IMDb title ID (tt followed by 7-9 digits) found in text.
+    """
+    match = IMDB_ID_PATTERN.search(text)
+    return match.group(1).lower() if match else None
+
+def find_imdb_id(video_file: Path) -> str | None:
+    """
+    Looks for the IMDb ID of a video file: first in its name, then in a .nfo sidecar
+    with the same stem, then in a movie.nfo in the same directory (Kodi/Jellyfin layout).
+    """
+    imdb_id = extract_imdb_id(video_file.name)
+    if imdb_id:
+        return imdb_id
+    for nfo in (video_file.with_suffix(".nfo"), video_file.parent / "movie.nfo"):
+        try:
+            with nfo.open("r", encoding="utf-8", errors="ignore") as f:
+                imdb_id = extract_imdb_id(f.read(NFO_READ_LIMIT))
+        except OSError:
+            continue
+        if imdb_id:
+            return imdb_id
+    return None
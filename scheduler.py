@@ -0,0 +1,95 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from utils import write_json_atomic
+
+DEFAULT_DAILY_LIMIT = 1000  # OMDb free tier
+SAVE_EVERY = 20  # persist usage after this many requests so a crash loses little
+
+class QuotaExceededError(Exception):
+    """Raised when the daily OMDb request budget for the API key is used up."""
+
+def today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+class FetchScheduler:
+    """
+    Tracks the daily OMDb request budget per API key and the files whose titles
+    could never be resolved. State is persisted to a small JSON file so a run that
+    stops on the quota continues with the right files the next day.
+    """
+    def __init__(self, state_file: Path, api_key: str, daily_limit: int = DEFAULT_DAILY_LIMIT):
+        self.state_file = Path(state_file)
+        self.key_id = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+        self.daily_limit = daily_limit
+        self.lock = threading.Lock()
+        self.unsaved = 0
+        state = {}
+        if self.state_file.exists():
+            try:
+                with self.state_file.open("r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except json.JSONDecodeError:
+                state = {}
+        self.usage = state.get("usage", {})
+        self.unresolved = state.get("unresolved", {})
+        # Only today's counters matter; drop the rest.
+        day = today()
+        for key_id in list(self.usage):
+            self.usage[key_id] = {d: n for d, n in self.usage[key_id].items() if d == day}
+
+    def used(self) -> int:
+        return self.usage.get(self.key_id, {}).get(today(), 0)
+
+    def remaining(self) -> int:
+        """
+        Returns how many OMDb requests are left for today.
+        """
+        return max(0, self.daily_limit - self.used())
+
+    def consume(self) -> None:
+        """
+        Counts one OMDb request against today's budget.
+
+        Raises:
+        QuotaExceededError: If the budget is already used up.
+        """
+        with self.lock:
+            day = today()
+            counts = self.usage.setdefault(self.key_id, {})
+            if counts.get(day, 0) >= self.daily_limit:
+                raise QuotaExceededError("Daily OMDb request limit reached")
+            counts[day] = counts.get(day, 0) + 1
+            self.unsaved += 1
+            if self.unsaved >= SAVE_EVERY:
+                self._save()
+
+    def exhaust(self) -> None:
+        """
+        Marks today's budget as used up, e.g. when OMDb itself reports the limit.
+        """
+        with self.lock:
+            self.usage.setdefault(self.key_id, {})[today()] = self.daily_limit
+            self._save()
+
+    def is_unresolved(self, file_name: str) -> bool:
+        return file_name in self.unresolved
+
+    def mark_unresolved(self, file_name: str) -> None:
+        with self.lock:
+            self.unresolved.setdefault(file_name, int(time.time()))
+
+    def mark_resolved(self, file_name: str) -> None:
+        with self.lock:
+            self.unresolved.pop(file_name, None)
+
+    def save(self) -> None:
+        with self.lock:
+            self._save()
+
+    def _save(self) -> None:
+        write_json_atomic(self.state_file, {"usage": self.usage, "unresolved": self.unresolved})
+        self.unsaved = 0
@@ -0,0 +1,78 @@
+import marshal
+import zlib
+from pathlib import Path
+from catalog import CatalogStore, MovieRecord, catalog_path, open_catalog, read_catalog, DEFAULT_PROFILE
+from utils import write_bytes_atomic
+
+SNAPSHOT_MAGIC = b"CSSNAP"
+SNAPSHOT_VERSION = 2
+FIELDS = ("file_name", "imdb_id", "title", "director", "year", "rating", "genres", "fetched_at",
+          "actors", "countries", "languages", "runtime")
+
+def snapshot_path(json_file: Path) -> Path:
+    """
+    Path of the record snapshot that belongs to the configured JSON_FILE.
+    """
+    return catalog_path(json_file).with_suffix(".snap")
+
+def write_snapshot(store: CatalogStore, path: Path) -> list[MovieRecord]:
+    """
+    Writes the typed fields of every catalog record to a compact snapshot file:
+    one list per field (columnar), encoded with marshal and compressed with zlib.
+    The snapshot is tagged with its format version and the catalog generation.
+
+    Returns:
+    list[MovieRecord]: The records that were written.
+    """
+    with store.lock:
+        generation = store.generation
+        records = list(store.records())
+    columns = tuple([getattr(record, field) for record in records] for field in FIELDS)
+    payload = zlib.compress(marshal.dumps((FIELDS, generation, columns)), 1)
+    write_bytes_atomic(path, SNAPSHOT_MAGIC + SNAPSHOT_VERSION.to_bytes(2, "little") + payload)
+    return records
+
+def read_snapshot(path: Path, generation: int) -> list[MovieRecord] | None:
+    """
+    Reads a snapshot written by write_snapshot.
+
+    Returns:
+    list[MovieRecord] | None: The records, or None if the snapshot is missing, unreadable,
+    of another format version, or older than the given catalog generation.
+    """
+    try:
+        raw = Path(path).read_bytes()
+    except OSError:
+        return None
+    header = len(SNAPSHOT_MAGIC) + 2
+    if raw[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC or \
+            int.from_bytes(raw[len(SNAPSHOT_MAGIC):header], "little") != SNAPSHOT_VERSION:
+        return None
+    try:
+        fields, snapshot_generation, columns = marshal.loads(zlib.decompress(raw[header:]))
+    except (zlib.error, ValueError, EOFError, TypeError):
+        return None
+    if fields != FIELDS or snapshot_generation != generation:
+        return None
+    return [MovieRecord(*values) for values in zip(*columns)]
+
+def load_records(json_file: Path, use_snapshot: bool = True, read_only: bool = False,
+                 profile: str = DEFAULT_PROFILE) -> list[MovieRecord]:
+    """
+    Loads every catalog record as a MovieRecord, in insertion order. The snapshot next to
+    the catalog is used when it matches the current catalog generation; otherwise the
+    records are read from the catalog and the snapshot is regenerated. Since importing a
+    changed JSON_FILE writes to the catalog, that also invalidates the snapshot.
+    With read_only, nothing is written: neither the snapshot nor a JSON_FILE import (see
+    catalog.read_catalog). profile is the field profile of such an import.
+    """
+    if read_only:
+        return read_catalog(json_file)
+    path = snapshot_path(json_file)
+    with open_catalog(json_file, profile) as store:
+        if not use_snapshot:
+            return list(store.records())
+        records = read_snapshot(path, store.generation)
+        if records is None:
+            records = write_snapshot(store, path)
+    return records
@@ -1,14 +1,17 @@
 import json
 from pathlib import Path
-from collections import Counter
+from catalog import catalog_exists, open_catalog, DEFAULT_PROFILE
 
-def collect_stats(json_file: Path, stats_file: Path) -> dict:
+def collect_stats(json_file: Path, stats_file: Path, profile: str = DEFAULT_PROFILE) -> dict:
     """
-    Collects statistics from movie data and saves them to a JSON file.
+    Collects statistics from the movie catalog and saves them to a JSON file.
+    The aggregates are computed by SQLite on the indexed catalog columns, so the
+    movie records themselves are never loaded.
     
     Parameters:
-    json_file (Path): Path to the JSON file containing movie data
+    json_file (Path): Path to the configured JSON data file (see catalog.open_catalog)
     stats_file (Path): Path to save the statistics data
+    profile (str): Field profile for records imported from json_file (see catalog.FIELD_PROFILES)
     
     Returns:
     dict: The collected statistics
@@ -16,12 +19,8 @@ def collect_stats(json_file: Path, stats_file: Path) -> dict:
     # Create parent directories if they don't exist
     stats_file.parent.mkdir(parents=True, exist_ok=True)
     
-    # Load movie data
-    try:
-        with json_file.open("r", encoding="utf-8") as f:
-            movies_data = json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        # Return default stats if movie data file doesn't exist or is invalid
+    if not catalog_exists(json_file):
+        # Return default stats if there is no movie data yet
         default_stats = {
             "movies": 0,
             "director": "N/A",
@@ -34,65 +33,35 @@ def collect_stats(json_file: Path, stats_file: Path) -> dict:
         save_stats(default_stats, stats_file)
         return default_stats
     
-    # Initialize counters and aggregators
-    director_count = Counter()
-    genre_count = Counter()
-    total_rating = 0.0
-    valid_ratings = 0
-    years = []
-    decades = Counter()
-    
-    # Process each movie
-    for movie in movies_data:
-        data = movie.get("data", {})
-        if isinstance(data, str):
-            try:
-                data = json.loads(data)
-            except json.JSONDecodeError:
-                continue
-        
-        # Extract director
-        director_field = data.get("Director", "")
-        if director_field and director_field != "N/A":
-            # Count primary directors (first in the list if multiple)
-            director = director_field.split(",")[0].strip()
-            director_count[director] += 1
-        
-        # Extract rating
-        try:
-            imdb_rating = float(data.get("imdbRating", "0.0"))
-            if imdb_rating > 0:
-                total_rating += imdb_rating
-                valid_ratings += 1
-        except ValueError:
-            pass
-        
-        # Extract year
-        year_str = data.get("Year", "")
-        from utils import extract_year
-        year = extract_year(year_str)
-        if year:
-            years.append((year, data.get("Title", "Unknown")))
-            decade = f"{(year // 10) * 10}s"
-            decades[decade] += 1
-        
-        # Extract genres
-        genres = data.get("Genre", "").split(", ")
-        for genre in genres:
-            if genre and genre != "N/A":
-                genre_count[genre] += 1
+    with open_catalog(json_file, profile) as store:
+        movies = len(store)
+        # Count primary directors (first in the list if multiple)
+        director_count = store.query(
+            "SELECT director, COUNT(*) AS n FROM movies WHERE director IS NOT NULL "
+            "GROUP BY director ORDER BY n DESC, MIN(rowid) LIMIT 5")
+        average_rating = store.query("SELECT AVG(rating) FROM movies WHERE rating > 0")[0][0]
+        decades = store.query(
+            "SELECT decade, COUNT(*) AS n FROM movies WHERE decade IS NOT NULL "
+            "GROUP BY decade ORDER BY n DESC, MIN(rowid)")
+        oldest = store.query(
+            "SELECT coalesce(title, 'Unknown') AS t FROM movies WHERE year IS NOT NULL ORDER BY year, t LIMIT 1")
+        newest = store.query(
+            "SELECT coalesce(title, 'Unknown') AS t FROM movies WHERE year IS NOT NULL ORDER BY year DESC, t DESC LIMIT 1")
+        genre_count = store.query(
+            "SELECT g.genre, COUNT(*) AS n FROM movie_genres g JOIN movies m ON m.file_name = g.file_name "
+            "GROUP BY g.genre ORDER BY n DESC, MIN(m.rowid) LIMIT 5")
     
     # Calculate statistics
     stats = {
-        "movies": len(movies_data),
-        "director": director_count.most_common(1)[0][0] if director_count else "N/A",
-        "director_count": dict(director_count.most_common(5)),
-        "rating": round(total_rating / valid_ratings, 1) if valid_ratings > 0 else 0.0,
-        "decade": decades.most_common(1)[0][0] if decades else "N/A",
-        "decade_distribution": dict(decades.most_common()),
-        "oldest_movie": min(years)[1] if years else "N/A",
-        "newest_movie": max(years)[1] if years else "N/A",
-        "genres": dict(genre_count.most_common(5))
+        "movies": movies,
+        "director": director_count[0][0] if director_count else "N/A",
+        "director_count": dict(director_count),
+        "rating": round(average_rating, 1) if average_rating else 0.0,
+        "decade": f"{decades[0][0]}s" if decades else "N/A",
+        "decade_distribution": {f"{decade}s": n for decade, n in decades},
+        "oldest_movie": oldest[0][0] if oldest else "N/A",
+        "newest_movie": newest[0][0] if newest else "N/A",
+        "genres": dict(genre_count)
     }
     
     # Save statistics
@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+import pytest
+
+# The modules live at the top level of the repository
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+@pytest.fixture
+def library(tmp_path) -> Path:
+    """A movies/ folder under tmp_path with Alien and Heat, and a catalog for both; returns JSON_FILE."""
+    from catalog import open_catalog
+    movies = tmp_path / "movies"
+    (movies / "sub").mkdir(parents=True)
+    (movies / "Alien 1979.mkv").write_text("")
+    (movies / "sub" / "Heat 1995.mkv").write_text("")
+    json_file = tmp_path / "app" / "movie_data.json"
+    json_file.parent.mkdir()
+    with open_catalog(json_file) as store:
+        for file_name, title, year, director in (("Alien 1979.mkv", "Alien", "1979", "Ridley Scott"),
+                                                 ("Heat 1995.mkv", "Heat", "1995", "Michael Mann")):
+            store.upsert({"file_name": file_name, "imdb_id": None, "fetched_at": 0,
+                          "data": {"Title": title, "Year": year, "Director": director, "imdbRating": "8.0"}})
+    return json_file
@@ -0,0 +1,65 @@
+import pytest
+import cache as cache_module
+from cache import ResponseCache, imdb_key, title_key
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+def test_keys_are_normalized():
+    assert title_key("The Matrix: Reloaded!", "2003") == title_key("the  matrix reloaded", "2003") == "t:the matrix reloaded|2003"
+    assert imdb_key("TT0133093") == "i:tt0133093"
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    with ResponseCache(tmp_path / "cache.db", ttl_days=1) as cache:
+        cache.put("k", {"Title": "Alien"})
+        clock.now += 86400 - 1
+        assert cache.get("k") == {"Title": "Alien"}
+        clock.now += 2
+        assert cache.get("k") is None
+
+def test_entries_survive_reopening(tmp_path, clock):
+    with ResponseCache(tmp_path / "cache.db") as cache:
+        cache.put("k", {"Title": "Ünïcode"})
+    with ResponseCache(tmp_path / "cache.db") as cache:
+        assert cache.get("k") == {"Title": "Ünïcode"}
+        assert cache.get("missing") is None
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    with ResponseCache(tmp_path / "cache.db", max_entries=10) as cache:
+        for i in range(10):
+            cache.put(f"k{i}", {"i": i})
+            clock.now += 1
+        for i in (0, 1):  # hits move the oldest entries to the back
+            assert cache.get(f"k{i}") == {"i": i}
+            clock.now += 1
+        cache.put("k10", {"i": 10})
+        kept = {key for key in [f"k{i}" for i in range(11)] if cache.get(key) is not None}
+    # Down to 90% of max_entries: the two least recently used go
+    assert kept == {"k0", "k1", "k4", "k5", "k6", "k7", "k8", "k9", "k10"}
+
+def test_hit_times_are_written_on_close(tmp_path, clock):
+    with ResponseCache(tmp_path / "cache.db") as cache:
+        cache.put("k", {})
+        clock.now += 100
+        cache.get("k")
+    with ResponseCache(tmp_path / "cache.db") as cache:
+        assert cache.conn.execute("SELECT last_used FROM responses").fetchone()[0] == clock.now
+
+def test_miss_recheck_interval_doubles(tmp_path, clock):
+    with ResponseCache(tmp_path / "cache.db") as cache:
+        assert [cache.record_miss("k") for _ in range(9)] == [1, 2, 4, 8, 16, 32, 64, 90, 90]
+        assert cache.is_known_miss("k")
+        clock.now += 90 * 86400 + 1
+        assert not cache.is_known_miss("k")
+        cache.clear_miss("k")
+        assert cache.record_miss("k") == 1
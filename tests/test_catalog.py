@@ -0,0 +1,112 @@
+import json
+import sqlite3
+import pytest
+from catalog import MovieRecord, catalog_path, open_catalog
+
+def record(title: str) -> dict:
+    return {"file_name": "Alien 1979.mkv", "imdb_id": "tt0078748", "fetched_at": 0,
+            "data": {"Title": title, "Year": "1979", "Director": "Ridley Scott"}}
+
+def write_json(path, records):
+    path.write_text(json.dumps(records), encoding="utf-8")
+
+def test_importing_another_file_keeps_newer_rows(tmp_path):
+    json_file = tmp_path / "movie_data.json"
+    write_json(json_file, [record("Old")])
+    open_catalog(json_file).close()
+    write_json(tmp_path / "other.json", [record("New")])
+    with open_catalog(json_file) as store:
+        store.import_json(tmp_path / "other.json")
+    with open_catalog(json_file) as store:
+        assert store.get("Alien 1979.mkv")["data"]["Title"] == "New"
+
+def test_exporting_a_backup_keeps_newer_rows(tmp_path):
+    json_file = tmp_path / "movie_data.json"
+    write_json(json_file, [record("Old")])
+    with open_catalog(json_file) as store:
+        store.upsert(record("Fetched"))
+        store.export_json(tmp_path / "backup.json")
+    with open_catalog(json_file) as store:
+        assert store.get("Alien 1979.mkv")["data"]["Title"] == "Fetched"
+    assert json.loads((tmp_path / "backup.json").read_text(encoding="utf-8"))[0]["data"]["Title"] == "Fetched"
+
+def test_changed_json_file_is_imported(tmp_path):
+    json_file = tmp_path / "movie_data.json"
+    write_json(json_file, [record("Old")])
+    with open_catalog(json_file) as store:
+        store.export_json(json_file)
+    write_json(json_file, [record("Edited")])
+    with open_catalog(json_file) as store:
+        assert store.get("Alien 1979.mkv")["data"]["Title"] == "Edited"
+
+def test_profile_applies_to_imports_from_any_reader(tmp_path):
+    from snapshot import load_records
+    from stats import collect_stats
+    for reader in (lambda json_file: load_records(json_file, profile="minimal"),
+                   lambda json_file: collect_stats(json_file, tmp_path / "stats.json", "minimal")):
+        json_file = tmp_path / f"{len(list(tmp_path.iterdir()))}" / "movie_data.json"
+        json_file.parent.mkdir()
+        write_json(json_file, [dict(record("Alien"), data={"Title": "Alien", "Plot": "In space..."})])
+        reader(json_file)
+        with open_catalog(json_file, "minimal") as store:
+            assert store.get("Alien 1979.mkv")["data"] == {"Title": "Alien"}
+
+OMDB = {"Title": "Heat", "Year": "1995", "Director": "Michael Mann, Someone Else", "Genre": "Crime, Drama",
+        "Actors": "Al Pacino, Robert De Niro", "Country": "United States", "Language": "English, Spanish",
+        "Runtime": "170 min", "imdbRating": "8.3", "imdbID": "tt0113277", "Plot": "A group of robbers..."}
+
+def fields(movie) -> tuple:
+    return tuple(getattr(movie, name) for name in MovieRecord.__slots__)
+
+def test_record_is_parsed_once_into_typed_fields():
+    movie = MovieRecord.from_record({"file_name": "Heat 1995.mkv", "fetched_at": 5, "data": json.dumps(OMDB)})
+    assert fields(movie) == ("Heat 1995.mkv", "tt0113277", "Heat", "Michael Mann", 1995, 1990, 8.3,
+                             ("Crime", "Drama"), 5, ("Al Pacino", "Robert De Niro"), ("United States",),
+                             ("English", "Spanish"), 170)
+    empty = MovieRecord.from_record({"file_name": "x.mkv", "data": {"Director": "N/A", "imdbRating": "N/A"}})
+    assert (empty.title, empty.director, empty.rating, empty.genres, empty.runtime) == (None, None, None, (), None)
+
+def test_upsert_replaces_by_file_name(tmp_path):
+    with open_catalog(tmp_path / "movie_data.json") as store:
+        store.upsert({"file_name": "Heat 1995.mkv", "data": OMDB})
+        store.upsert({"file_name": "Heat 1995.mkv", "data": {**OMDB, "Genre": "Thriller"}})
+        store.upsert_many([{"file_name": "Alien 1979.mkv", "data": {"Title": "Alien"}}])
+        assert len(store) == 2 and "Heat 1995.mkv" in store
+        assert [fields(movie) for movie in store.records()] == [
+            fields(MovieRecord.from_record(record)) for record in store]
+        assert store.query("SELECT genre FROM movie_genres WHERE file_name = 'Heat 1995.mkv'") == [("Thriller",)]
+        assert store.get("Heat 1995.mkv")["data"] == {**OMDB, "Genre": "Thriller"}
+        assert store.get("Heat 1995.mkv", details=False)["data"].get("Plot") is None
+
+def test_first_release_catalog_is_migrated(tmp_path):
+    json_file = tmp_path / "movie_data.json"
+    conn = sqlite3.connect(catalog_path(json_file))
+    with conn:
+        conn.execute("CREATE TABLE movies (file_name TEXT PRIMARY KEY, imdb_id TEXT, title TEXT, director TEXT, "
+                     "year INTEGER, decade INTEGER, rating REAL, genre TEXT, fetched_at INTEGER, data TEXT NOT NULL)")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("INSERT INTO movies (file_name, title, data) VALUES (?, ?, ?)",
+                     ("Heat 1995.mkv", "Heat", json.dumps(OMDB)))
+    conn.close()
+    with open_catalog(json_file) as store:
+        movie, = store.records()
+        assert movie.actors == ("Al Pacino", "Robert De Niro") and movie.runtime == 170
+        assert json.loads(store.query("SELECT data FROM movies")[0][0]).get("Plot") is None
+        assert store.get("Heat 1995.mkv")["data"] == OMDB
+        generation = store.generation
+    with open_catalog(json_file) as store:
+        assert store.generation == generation  # migrated once
+
+@pytest.mark.parametrize("profile, details", [("full", {"Plot": "A group of robbers..."}), ("minimal", {})])
+def test_profile_decides_what_is_stored(tmp_path, profile, details):
+    with open_catalog(tmp_path / "movie_data.json", profile) as store:
+        store.upsert({"file_name": "Heat 1995.mkv", "data": OMDB})
+        assert store.get("Heat 1995.mkv")["data"] == {**{key: value for key, value in OMDB.items() if key != "Plot"},
+                                                      **details}
+    with open_catalog(tmp_path / "movie_data.json", "full") as store:
+        # Switching back to full cannot bring dropped fields back, but keeps the hot ones
+        assert store.get("Heat 1995.mkv", details=False)["data"]["Actors"] == OMDB["Actors"]
+
+def test_unknown_profile_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        open_catalog(tmp_path / "movie_data.json", "everything")
@@ -0,0 +1,25 @@
+import json
+import os
+from pathlib import Path
+from categorizer import create_shortcuts_and_categorize, plan_categorize
+
+def test_relative_source_resyncs_nothing(tmp_path, library, monkeypatch):
+    json_file = library
+    monkeypatch.chdir(tmp_path)
+    create_shortcuts_and_categorize(Path("movies"), json_file, tmp_path / "cat", True, True, True, strategy="symlink")
+    link, = (tmp_path / "cat" / "ByDirector").glob("*Michael Mann/Heat/Heat.mkv")
+    assert os.path.isabs(os.readlink(link)) and link.resolve() == tmp_path.resolve() / "movies" / "sub" / "Heat 1995.mkv"
+    ops, desired, _ = plan_categorize(Path("movies"), json_file, tmp_path / "cat", True, True, True, "symlink")
+    assert ops == [] and len(desired) == 6
+
+def test_dry_run_writes_nothing(tmp_path, library):
+    json_file = library
+    (tmp_path / "movies" / "Se7en 1995.mkv").write_text("")
+    json_file.write_text(json.dumps([{"file_name": "Se7en 1995.mkv", "imdb_id": None, "fetched_at": 0,
+                                      "data": {"Title": "Se7en", "Year": "1995", "Director": "David Fincher"}}]))
+    before = {path: path.stat().st_mtime_ns for path in json_file.parent.iterdir()}
+    ops, desired, _ = plan_categorize(tmp_path / "movies", json_file, tmp_path / "cat", True, False, False, "symlink")
+    assert {path: path.stat().st_mtime_ns for path in json_file.parent.iterdir()} == before
+    assert not (tmp_path / "cat").exists()
+    assert sorted(path.name for path in desired) == ["Alien.mkv", "Heat.mkv", "Se7en.mkv"]
+    assert len(ops) == 10
@@ -0,0 +1,27 @@
+import pytest
+from catalog import MovieRecord
+from dimensions import get_dimensions, group_movies
+
+def movies(counts: dict[str, int]) -> list[MovieRecord]:
+    return [MovieRecord(f"{director} {i}.mkv", title=f"{director} {i}", director=director, year=2000)
+            for director, count in counts.items() for i in range(count)]
+
+def director_folders(counts: dict[str, int], sharding: str, stable_names: bool) -> dict[str, str]:
+    groups = group_movies(movies(counts), get_dimensions(["director"]), sharding, stable_names)["director"]
+    return {folder.rsplit("/", 1)[-1].split(". ", 1)[-1]: folder for folder in groups}
+
+@pytest.mark.parametrize("sharding", ["none", "letter", "rank"])
+def test_stable_names_survive_reordering(sharding):
+    # 150 directors with one movie each, then Zemeckis climbs from rank 150 to rank 1
+    counts = {f"Director {i:03d}": 1 for i in range(149)}
+    before = director_folders({**counts, "Zemeckis": 1}, sharding, True)
+    after = director_folders({**counts, "Zemeckis": 5}, sharding, True)
+    assert before == after
+
+def test_rank_sharding_without_stable_names():
+    folders = director_folders({"Nolan": 3, "Scott": 2, "Mann": 1}, "rank", False)
+    assert folders == {"Nolan": "0001-0100/1. Nolan", "Scott": "0001-0100/2. Scott", "Mann": "0001-0100/3. Mann"}
+
+def test_letter_sharding():
+    folders = director_folders({"Élie": 2, "3 Brothers": 1}, "letter", True)
+    assert folders == {"Élie": "E/Élie", "3 Brothers": "0-9/3 Brothers"}
@@ -0,0 +1,84 @@
+import pytest
+import fetcher
+from cache import ResponseCache, title_key
+from fetcher import fetch_movie_data, rank_search_results, resolve_movie
+from catalog import open_catalog
+
+class Response:
+    def __init__(self, data: dict, status_code: int = 200):
+        self.data = data
+        self.status_code = status_code
+
+    def json(self) -> dict:
+        return self.data
+
+class FakeOmdb:
+    """
+    Answers like OMDb: titles in movies are found, everything else is a miss; titles in
+    broken fail with HTTP 500.
+    """
+    def __init__(self, movies=(), broken=()):
+        self.movies = set(movies)
+        self.broken = set(broken)
+        self.queries = []
+
+    def get(self, url, params, timeout):
+        self.queries.append({key: value for key, value in params.items() if key != "apikey"})
+        title = params.get("t") or params.get("s")
+        if title in self.broken:
+            return Response({"Response": "False", "Error": "Server error"}, 500)
+        if params.get("t") in self.movies:
+            return Response({"Response": "True", "Title": title, "Year": params.get("y", "2000"),
+                             "imdbID": f"tt{abs(hash(title)) % 10 ** 7:07d}", "Director": "Someone"})
+        return Response({"Response": "False", "Error": "Movie not found!"})
+
+@pytest.fixture
+def omdb(monkeypatch):
+    def install(**kwargs):
+        fake = FakeOmdb(**kwargs)
+        monkeypatch.setattr(fetcher, "_session", fake)
+        return fake
+    monkeypatch.setattr(fetcher, "backoff_delay", lambda attempt: 0)
+    return install
+
+def test_resolve_falls_back_through_the_tiers(tmp_path, omdb):
+    fake = omdb(movies={"Heat"})
+    with ResponseCache(tmp_path / "cache.db") as cache:
+        assert resolve_movie("Heat 1080p BluRay", "1995", "key", cache)["Title"] == "Heat"
+    assert fake.queries == [{"t": "Heat 1080p BluRay", "y": "1995"}, {"t": "Heat 1080p BluRay"},
+                            {"t": "Heat", "y": "1995"}]
+
+def test_resolve_miss_searches_once(tmp_path, omdb):
+    fake = omdb()
+    with ResponseCache(tmp_path / "cache.db") as cache:
+        assert resolve_movie("Title", "2010", "key", cache) == {}
+    assert fake.queries[-1] == {"s": "Title", "type": "movie"}
+
+def test_search_results_prefer_exact_movies_near_the_year():
+    results = [{"Title": "Movie", "Year": "2011–2013", "Type": "series", "imdbID": "tt1"},
+               {"Title": "Movie 2", "Year": "2010", "Type": "movie", "imdbID": "tt2"},
+               {"Title": "Movie", "Year": "2009", "Type": "movie", "imdbID": "tt3"},
+               {"Title": "Movie", "Year": "1990", "Type": "movie", "imdbID": "tt4"}]
+    assert [result["imdbID"] for result in rank_search_results(results, "Movie", "2010")] == ["tt3", "tt1", "tt2"]
+
+def make_library(root):
+    library = root / "movies"
+    library.mkdir()
+    for name in ("Alien 1979.mkv", "Heat 1995.mkv", "Nope 2001.mkv"):
+        (library / name).write_text("")
+    return library, root / "app" / "movie_data.json"
+
+def test_misses_are_marked_and_errors_retried(tmp_path, omdb):
+    library, json_file = make_library(tmp_path)
+    omdb(movies={"Alien"}, broken={"Heat"})
+    fetch_movie_data(library, json_file, "key", False)
+    with ResponseCache(json_file.with_name("omdb_cache.db")) as cache:
+        assert cache.is_known_miss(title_key("Nope", "2001"))
+        assert not cache.is_known_miss(title_key("Heat", "1995"))
+
+    fake = omdb(movies={"Alien", "Heat"})
+    fetch_movie_data(library, json_file, "key", False)
+    with open_catalog(json_file) as store:
+        assert sorted(record["file_name"] for record in store) == ["Alien 1979.mkv", "Heat 1995.mkv"]
+    # The known miss waits for its re-check; the failed request is simply tried again
+    assert all(query.get("t") != "Nope" for query in fake.queries)
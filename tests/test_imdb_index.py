@@ -0,0 +1,18 @@
+import pytest
+from imdb_index import ImdbIndex, build_index
+
+BASICS = ("tconst\ttitleType\tprimaryTitle\toriginalTitle\tisAdult\tstartYear\tendYear\truntimeMinutes\tgenres\n"
+          "tt0078748\tmovie\tAlien\tAlien\t0\t1979\t\\N\t117\tHorror,Sci-Fi\n"
+          "tt0113277\tmovie\tHeat\tHeat\t0\t1995\t\\N\t170\tCrime,Drama\n"
+          "tt0000001\ttvSeries\tHeat\tHeat\t0\t1995\t1996\t\\N\tDrama\n")
+
+@pytest.mark.parametrize("folder", ["imdb", "imdb data #1", "what?", "100% films"])
+def test_index_in_any_folder(tmp_path, folder):
+    basics = tmp_path / "title.basics.tsv"
+    basics.write_text(BASICS, encoding="utf-8")
+    index_file = tmp_path / folder / "imdb_index.db"
+    assert build_index(basics, index_file) == 2
+    with ImdbIndex(index_file) as index:
+        assert index.lookup("Heat", "1995")["imdbID"] == "tt0113277"
+        assert index.lookup_id("tt0078748")["Title"] == "Alien"
+        assert index.lookup("Heat", "1980") is None
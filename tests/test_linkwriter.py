@@ -0,0 +1,54 @@
+import sys
+import threading
+import types
+import pytest
+import linkwriter
+from linkwriter import LinkWriter
+
+@pytest.fixture
+def com(monkeypatch):
+    # Records CoInitialize/CoUninitialize per thread; the real pythoncom only exists on Windows
+    calls = []
+    pythoncom = types.ModuleType("pythoncom")
+    pythoncom.CoInitialize = lambda: calls.append(("init", threading.get_ident()))
+    pythoncom.CoUninitialize = lambda: calls.append(("uninit", threading.get_ident()))
+    monkeypatch.setitem(sys.modules, "pythoncom", pythoncom)
+    return calls
+
+def fake_shell_link(target, link_path):
+    if getattr(linkwriter._local, "shell", None) is None:
+        sys.modules["pythoncom"].CoInitialize()
+        linkwriter._local.shell = object()
+    if target == "exit":
+        raise SystemExit(1)
+
+def test_workers_are_reused_and_release_com(com):
+    writer = LinkWriter(fake_shell_link, 4)
+    for category in ("ByDirector", "ByDecade", "ByGenre"):
+        assert writer.write([(None, None, False)] * 50, category) == [None] * 50
+    workers = list(writer.workers)
+    assert len(workers) == 4
+    writer.write([(None, None, False)], "single")  # written on the calling thread
+    writer.close()
+    assert not any(worker.is_alive() for worker in workers)
+    initialized = [thread for call, thread in com if call == "init"]
+    assert threading.get_ident() in initialized and len(initialized) == len(set(initialized)) <= 5
+    assert sorted(initialized) == sorted(thread for call, thread in com if call == "uninit")
+
+def test_worker_exceptions_reach_the_caller(com):
+    writer = LinkWriter(fake_shell_link, 2)
+    with pytest.raises(SystemExit):
+        writer.write([(None, None, False), ("exit", None, False), (None, None, False)])
+    assert writer.write([(None, None, False)] * 4) == [None] * 4
+    writer.close()
+    assert {thread for call, thread in com if call == "init"} == {thread for call, thread in com if call == "uninit"}
+
+def test_errors_are_returned_in_order(tmp_path):
+    target = tmp_path / "movie.mkv"
+    target.write_text("")
+    (tmp_path / "taken.mkv").write_text("")
+    links = [(target, tmp_path / f"{name}.mkv", False) for name in ("a", "taken", "b")]
+    with LinkWriter(lambda target, link_path: link_path.symlink_to(target), 3) as writer:
+        errors = writer.write(links, "ByDirector")
+    assert [type(error) for error in errors] == [type(None), FileExistsError, type(None)]
+    assert writer.report()[0].startswith("ByDirector: 2 links")
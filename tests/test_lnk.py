@@ -0,0 +1,25 @@
+import pytest
+from lnk import LnkError, build_lnk, parse_lnk, read_lnk, write_lnk
+
+@pytest.mark.parametrize("target", [
+    r"C:\Movies\Alien (1979)\Alien.mkv",
+    r"D:\Filme\Ünïcode ☃\黒澤明.mkv",
+    r"\\nas\share\Movies\Heat.mkv",
+    r"\\nas\share\Movies\Ünïcode ☃.mkv",
+    r"\\nås☃\shäre\Фильмы\Сталкер.mkv",
+])
+def test_round_trip(target):
+    assert parse_lnk(build_lnk(target, working_dir="C:\\Movies", relative_path="..\\x.mkv")) == target
+
+def test_unc_share_root():
+    assert parse_lnk(build_lnk(r"\\nas\share")) == r"\\nas\share"
+
+def test_write_and_read(tmp_path):
+    shortcut = tmp_path / "Alien.lnk"
+    write_lnk(r"C:\Movies\Ünïcode ☃.mkv", shortcut)
+    assert read_lnk(shortcut) == r"C:\Movies\Ünïcode ☃.mkv"
+
+@pytest.mark.parametrize("data", [b"", b"not a shell link" * 10, build_lnk(r"C:\a.mkv")[:0x60]])
+def test_rejects_invalid_data(data):
+    with pytest.raises(LnkError):
+        parse_lnk(data)
@@ -0,0 +1,78 @@
+import errno
+import os
+from pathlib import Path
+import pytest
+import mover
+from mover import MoveOp, apply_moves, copy_and_remove, plan_moves
+
+def test_copy_and_remove(tmp_path):
+    src = tmp_path / "Alien 1979.mkv"
+    src.write_bytes(os.urandom(100000))
+    data = src.read_bytes()
+    os.utime(src, (1000000, 1000000))
+    dest = tmp_path / "out" / "Alien 1979.mkv"
+    dest.parent.mkdir()
+    assert copy_and_remove(src, dest) == len(data)
+    assert dest.read_bytes() == data and dest.stat().st_mtime == 1000000
+    assert not src.exists()
+    assert os.listdir(dest.parent) == ["Alien 1979.mkv"]
+
+@pytest.mark.parametrize("kernel_copy", ["copy_file_range", "sendfile"])
+def test_buffered_copy_when_the_kernel_cannot(tmp_path, monkeypatch, kernel_copy):
+    def unsupported(*args):
+        raise OSError(errno.EXDEV, "not supported")
+    monkeypatch.setattr(os, kernel_copy, unsupported, raising=False)
+    monkeypatch.setattr(mover, "COPY_BUFFER", 1000)
+    src = tmp_path / "a.mkv"
+    src.write_bytes(os.urandom(5500))
+    data = src.read_bytes()
+    assert copy_and_remove(src, tmp_path / "b.mkv") == 5500
+    assert (tmp_path / "b.mkv").read_bytes() == data
+
+def test_failed_copy_keeps_the_source(tmp_path, monkeypatch):
+    def broken(src, dst):
+        dst.write(b"half")
+        raise OSError(errno.ENOSPC, "No space left on device")
+    monkeypatch.setattr(mover, "_copy_data", broken)
+    src = tmp_path / "Alien 1979.mkv"
+    src.write_bytes(b"movie")
+    with pytest.raises(OSError):
+        copy_and_remove(src, tmp_path / "out.mkv")
+    assert src.read_bytes() == b"movie"
+    assert sorted(os.listdir(tmp_path)) == ["Alien 1979.mkv"]
+
+def test_plan_moves(tmp_path):
+    source = tmp_path / "in"
+    (source / "sub").mkdir(parents=True)
+    (source / "Alien 1979.mkv").write_bytes(b"x" * 7)
+    (source / "sub" / "Alien 1979.mkv").write_bytes(b"x" * 3)
+    dest = tmp_path / "out"
+    ops = plan_moves(source, dest)
+    assert ops[:2] == [MoveOp("mkdir", dest), MoveOp("mkdir", dest / "Alien")]
+    # The second file with the same name gets a counter suffix, whichever is scanned first
+    assert sorted(op.target.name for op in ops[2:]) == ["Alien 1979.mkv", "Alien 1979_1.mkv"]
+    assert all(op.kind == "rename" and op.size == op.path.stat().st_size for op in ops[2:])
+    assert not dest.exists()
+
+def test_moves_across_devices_are_copied(tmp_path, monkeypatch):
+    def cross_device(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+    monkeypatch.setattr(os, "rename", cross_device)
+    source = tmp_path / "in"
+    source.mkdir()
+    (source / "Heat 1995.mkv").write_bytes(b"heat")
+    (tmp_path / "out" / "Heat").mkdir(parents=True)
+    (tmp_path / "out" / "Heat" / "Heat 1995.mkv").write_bytes(b"taken since the plan")
+    ops = [MoveOp("rename", source / "Heat 1995.mkv", tmp_path / "out" / "Heat" / "Heat 1995.mkv", 4)]
+    report = apply_moves(ops, jobs=2)
+    assert (tmp_path / "out" / "Heat" / "Heat 1995_1.mkv").read_bytes() == b"heat"
+    assert (tmp_path / "out" / "Heat" / "Heat 1995.mkv").read_bytes() == b"taken since the plan"
+    assert not (source / "Heat 1995.mkv").exists()
+    assert report.renamed == 0 and [files for files, _, _ in report.stats.values()] == [1]
+
+def test_moves_on_one_device_are_renamed(tmp_path):
+    (tmp_path / "Heat 1995.mkv").write_bytes(b"heat")
+    ops = [MoveOp("mkdir", tmp_path / "out"), MoveOp("copy", tmp_path / "Heat 1995.mkv", tmp_path / "out" / "Heat.mkv")]
+    report = apply_moves(ops)
+    assert report.renamed == 1 and report.stats == {}
+    assert (tmp_path / "out" / "Heat.mkv").read_bytes() == b"heat"
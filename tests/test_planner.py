@@ -0,0 +1,47 @@
+import json
+from pathlib import Path
+import pytest
+from planner import PLAN_VERSION, Plan, apply_plan, plan_category_sync, plan_move
+
+def test_move_plan_round_trip(tmp_path):
+    (tmp_path / "in").mkdir()
+    (tmp_path / "in" / "Alien 1979.mkv").write_bytes(b"x" * 10)
+    (tmp_path / "in" / "Heat 1995.mkv").write_bytes(b"x" * 20)
+    plan = plan_move(tmp_path / "in", tmp_path / "out", jobs=3)
+    assert plan.summary() == {"operations": {"mkdir": 3, "rename": 2}, "total": 5,
+                              "bytes_copied": 0, "bytes_renamed": 30}
+    plan.save(tmp_path / "plan.json")
+    loaded = Plan.load(tmp_path / "plan.json")
+    assert (loaded.action, loaded.settings, loaded.ops, loaded.links, loaded.created) == \
+           (plan.action, plan.settings, plan.ops, None, plan.created)
+
+    apply_plan(loaded)
+    assert (tmp_path / "out" / "Alien" / "Alien 1979.mkv").read_bytes() == b"x" * 10
+    assert not list((tmp_path / "in").iterdir())
+
+def test_categorize_plan_round_trip(tmp_path, library):
+    json_file = library
+    dest_base = tmp_path / "cat"
+    plan = plan_category_sync(tmp_path / "movies", json_file, dest_base, True, True, False,
+                              strategy="symlink", sharding="rank", stable_names=True)
+    assert not dest_base.exists()
+    plan.save(tmp_path / "plan.json")
+    loaded = Plan.load(tmp_path / "plan.json")
+    assert (loaded.action, loaded.ops, loaded.links) == ("categorize", plan.ops, plan.links)
+    assert loaded.settings == json.loads(json.dumps(plan.settings))
+    assert loaded.settings["stable_names"] and loaded.settings["rankings"]
+
+    apply_plan(loaded)
+    for path, target in plan.links.items():
+        assert (dest_base / path).resolve() == target.resolve()
+    for folder in loaded.settings["rankings"]:
+        assert (dest_base / folder / "ranking.json").exists()
+    assert plan_category_sync(tmp_path / "movies", json_file, dest_base, True, True, False, strategy="symlink",
+                              sharding="rank", stable_names=True).ops == []
+
+@pytest.mark.parametrize("version", [None, PLAN_VERSION + 1])
+def test_unknown_plan_version_is_rejected(version):
+    data = Plan("move", {}, []).to_json()
+    data["version"] = version
+    with pytest.raises(ValueError):
+        Plan.from_json(data)
@@ -0,0 +1,117 @@
+import os
+from pathlib import Path
+from linkwriter import LinkWriter, get_link_creator
+from treesync import STAGING_PREFIX, SyncOp, apply_staged, apply_sync, plan_sync
+
+def make_movies(root: Path) -> dict[str, Path]:
+    (root / "movies").mkdir()
+    movies = {}
+    for name in ("Alien.mkv", "Heat.mkv"):
+        movies[name] = root / "movies" / name
+        movies[name].write_text(name)
+    return movies
+
+def sync(dest_base: Path, desired: dict[Path, Path], strategy: str = "symlink", staged: bool = False) -> list[SyncOp]:
+    roots = sorted({path.parts[0] for path in desired})
+    ops = plan_sync(dest_base, roots, desired, strategy)
+    with LinkWriter(get_link_creator(strategy), 2) as writer:
+        if staged:
+            apply_staged(dest_base, ops, desired, writer, strategy)
+        else:
+            apply_sync(dest_base, ops, writer, strategy)
+    return ops
+
+def test_foreign_shortcuts_are_kept(tmp_path):
+    movies = make_movies(tmp_path)
+    dest_base = tmp_path / "cat"
+    sync(dest_base, {Path("ByDirector/Scott/Alien/Alien.mkv"): movies["Alien.mkv"]})
+    foreign = dest_base / "ByDirector" / "Scott" / "notes.lnk"
+    foreign.write_bytes(b"not a shell link")
+    ops = sync(dest_base, {Path("ByDirector/Scott/Heat/Heat.mkv"): movies["Heat.mkv"]})
+    assert SyncOp("remove", Path("ByDirector/Scott/Alien/Alien.mkv")) in ops
+    assert all(op.path != Path("ByDirector/Scott/notes.lnk") for op in ops)
+    assert foreign.read_bytes() == b"not a shell link"
+
+def test_second_sync_changes_nothing(tmp_path):
+    movies = make_movies(tmp_path)
+    dest_base = tmp_path / "cat"
+    desired = {Path("ByDirector/Scott/Alien/Alien.mkv"): movies["Alien.mkv"],
+               Path("ByDecade/1990s/Heat/Heat.mkv"): movies["Heat.mkv"]}
+    ops = sync(dest_base, desired)
+    assert sorted(op.kind for op in ops) == ["create"] * 2 + ["mkdir"] * 6
+    assert (dest_base / "ByDirector/Scott/Alien/Alien.mkv").read_text() == "Alien.mkv"
+    assert plan_sync(dest_base, ["ByDirector", "ByDecade"], desired, "symlink") == []
+
+def test_changes_are_diffed(tmp_path):
+    movies = make_movies(tmp_path)
+    dest_base = tmp_path / "cat"
+    sync(dest_base, {Path("ByDirector/Scott/Alien/Alien.mkv"): movies["Alien.mkv"],
+                     Path("ByDirector/Mann/Heat/Heat.mkv"): movies["Heat.mkv"]})
+    ops = sync(dest_base, {Path("ByDirector/Scott/Alien/Alien.mkv"): movies["Heat.mkv"]})
+    assert ops == [SyncOp("remove", Path("ByDirector/Mann/Heat/Heat.mkv")),
+                   SyncOp("rmdir", Path("ByDirector/Mann/Heat")), SyncOp("rmdir", Path("ByDirector/Mann")),
+                   SyncOp("retarget", Path("ByDirector/Scott/Alien/Alien.mkv"), movies["Heat.mkv"])]
+    assert (dest_base / "ByDirector/Scott/Alien/Alien.mkv").read_text() == "Heat.mkv"
+    assert not (dest_base / "ByDirector/Mann").exists()
+
+def test_hard_links_are_recognized_from_the_state(tmp_path):
+    movies = make_movies(tmp_path)
+    dest_base = tmp_path / "cat"
+    desired = {Path("ByDirector/Scott/Alien/Alien.mkv"): movies["Alien.mkv"]}
+    sync(dest_base, desired, "hardlink")
+    link = dest_base / "ByDirector/Scott/Alien/Alien.mkv"
+    assert not link.is_symlink() and link.samefile(movies["Alien.mkv"])
+    assert plan_sync(dest_base, ["ByDirector"], desired, "hardlink") == []
+
+def test_strategy_switch_rewrites_only_that_root(tmp_path):
+    movies = make_movies(tmp_path)
+    dest_base = tmp_path / "cat"
+    director = {Path("ByDirector/Scott/Alien/Alien.mkv"): movies["Alien.mkv"]}
+    decade = {Path("ByDecade/1970s/Alien/Alien.mkv"): movies["Alien.mkv"]}
+    sync(dest_base, {**director, **decade}, "symlink")
+    assert sync(dest_base, decade, "hardlink") == [SyncOp("retarget", *next(iter(decade.items())))]
+    assert not (dest_base / "ByDecade/1970s/Alien/Alien.mkv").is_symlink()
+    assert plan_sync(dest_base, ["ByDirector"], director, "symlink") == []
+    assert [op.kind for op in plan_sync(dest_base, ["ByDirector"], director, "hardlink")] == ["retarget"]
+
+def test_foreign_files_and_their_folders_are_kept(tmp_path):
+    movies = make_movies(tmp_path)
+    dest_base = tmp_path / "cat"
+    sync(dest_base, {Path("ByDirector/Scott/Alien/Alien.mkv"): movies["Alien.mkv"]})
+    (dest_base / "ByDirector/Scott/Alien/folder.jpg").write_text("poster")
+    sync(dest_base, {Path("ByDirector/Mann/Heat/Heat.mkv"): movies["Heat.mkv"]})
+    assert not (dest_base / "ByDirector/Scott/Alien/Alien.mkv").exists()
+    assert (dest_base / "ByDirector/Scott/Alien/folder.jpg").read_text() == "poster"
+
+def test_staged_sync_swaps_in_changed_roots(tmp_path):
+    movies = make_movies(tmp_path)
+    dest_base = tmp_path / "cat"
+    director = {Path("ByDirector/Scott/Alien/Alien.mkv"): movies["Alien.mkv"]}
+    decade = {Path("ByDecade/1970s/Alien/Alien.mkv"): movies["Alien.mkv"]}
+    sync(dest_base, {**director, **decade}, staged=True)
+    assert (dest_base / "ByDecade/1970s/Alien/Alien.mkv").read_text() == "Alien.mkv"
+    decade_inode = (dest_base / "ByDecade").stat().st_ino
+    (dest_base / "ByDirector/Scott/Alien/folder.jpg").write_text("poster")
+    (dest_base / (STAGING_PREFIX + "ByDirector.dead")).mkdir()
+
+    director = {Path("ByDirector/Scott/Alien/Alien.mkv"): movies["Heat.mkv"]}
+    roots = ["ByDirector", "ByDecade"]
+    ops = plan_sync(dest_base, roots, {**director, **decade}, "symlink")
+    with LinkWriter(get_link_creator("symlink"), 2) as writer:
+        applied = apply_staged(dest_base, ops, {**director, **decade}, writer, "symlink")
+    assert [op.kind for op in applied] == ["retarget"]
+    assert (dest_base / "ByDirector/Scott/Alien/Alien.mkv").read_text() == "Heat.mkv"
+    assert (dest_base / "ByDirector/Scott/Alien/folder.jpg").read_text() == "poster"
+    assert (dest_base / "ByDecade").stat().st_ino == decade_inode
+    assert not list(dest_base.glob(STAGING_PREFIX + "*"))
+    assert plan_sync(dest_base, roots, {**director, **decade}, "symlink") == []
+
+def test_relative_links_stay_valid_after_the_swap(tmp_path):
+    movies = make_movies(tmp_path)
+    dest_base = tmp_path / "cat"
+    desired = {Path("ByDirector/Scott/Alien/Alien.mkv"): movies["Alien.mkv"]}
+    sync(dest_base, desired, "relsymlink", staged=True)
+    link = dest_base / "ByDirector/Scott/Alien/Alien.mkv"
+    assert not Path(os.readlink(link)).is_absolute()
+    assert link.read_text() == "Alien.mkv"
+    assert plan_sync(dest_base, ["ByDirector"], desired, "relsymlink") == []
@@ -0,0 +1,51 @@
+import json
+import pytest
+from utils import iter_json_array, parse_movie_filename, strip_release_tags
+
+VALID = [
+    "[]",
+    " [ ] ",
+    "[1.25, 3e5, -7]",
+    '[{"a": [1, {"b": "x, ]"}]}, "\\u00e9t\\u00e9", true, false, null, -0.5E-3]',
+    '[\n  {"Title": "Alien"},\n  {"Title": "Heat"}\n]\n',
+    "\ufeff[12345678901234567890, 1]",
+]
+
+MALFORMED = ["", "\ufeff", "{}", "[", "[1", "[1,", "[1,]", "[,1]", "[1 2]", "[1,,2]", "[1]x", "[] 1", '["a"', "[tru]"]
+
+@pytest.mark.parametrize("chunk_size", range(1, 9))
+@pytest.mark.parametrize("text", VALID)
+def test_matches_json_load(tmp_path, text, chunk_size):
+    path = tmp_path / "data.json"
+    path.write_text(text, encoding="utf-8")
+    assert list(iter_json_array(path, chunk_size)) == json.loads(text.lstrip("\ufeff"))
+
+@pytest.mark.parametrize("chunk_size", range(1, 9))
+@pytest.mark.parametrize("text", MALFORMED)
+def test_rejects_malformed_arrays(tmp_path, text, chunk_size):
+    path = tmp_path / "data.json"
+    path.write_text(text, encoding="utf-8")
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(path, chunk_size))
+
+@pytest.mark.parametrize("file_name, expected", [
+    ("Title (2010).mkv", ("Title", "2010")),
+    ("Alien [1979] 1080p.mkv", ("Alien", "1979")),
+    ("The Movie - (2010).mkv", ("The Movie", "2010")),
+    ("Heat.1995.1080p.BluRay.x264.mp4", ("Heat", "1995")),
+    ("(500) Days of Summer (2009).mkv", ("(500) Days of Summer", "2009")),
+    ("Se7en.mkv", ("Se7en", "")),
+])
+def test_parse_movie_filename(file_name, expected):
+    assert parse_movie_filename(file_name) == expected
+
+@pytest.mark.parametrize("title, expected", [
+    ("Title (", "Title"),
+    ("Movie [Extended Cut", "Movie"),
+    ("Blade Runner (Final Cut) 1080p", "Blade Runner"),
+    ("Amelie -", "Amelie"),
+    ("Heat 1080p BluRay", "Heat"),
+    ("1080p", "1080p"),
+])
+def test_strip_release_tags(title, expected):
+    assert strip_release_tags(title) == expected
@@ -0,0 +1,298 @@
+import ctypes
+import json
+import os
+import shutil
+import sys
+import threading
+import uuid
+from pathlib import Path
+from typing import NamedTuple
+from utils import write_json_atomic
+from linkwriter import LinkWriter
+from lnk import LnkError, read_lnk
+
+SYNC_STATE_FILE = ".cinemashelf_sync.json"
+STRATEGY_KEY = "#strategy"  # link strategy per category root ("#strategy/ByDirector"), stored with the link targets
+LINK_SUFFIX = ".lnk"
+STAGING_PREFIX = ".cinemashelf_staging."  # category roots being built, swapped in when done
+TRASH_DIR = ".cinemashelf_trash"  # replaced category roots, removed in the background
+
+class SyncOp(NamedTuple):
+    """
+    One change to the category tree. kind is "remove", "rmdir", "mkdir", "create" or
+    "retarget"; target is the movie file a link points to (None for directory ops).
+    """
+    kind: str
+    path: Path
+    target: Path | None = None
+
+def _same_target(a: str | None, b: Path) -> bool:
+    return a is not None and os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b))
+
+def _strategy_key(root: str) -> str:
+    return f"{STRATEGY_KEY}/{root}"
+
+def root_strategy(state: dict[str, str], root: str) -> str | None:
+    """
+    Returns the link strategy the category root was last synced with, from the sync state.
+    States written before strategies were kept per root hold one for all roots.
+    """
+    return state.get(_strategy_key(root), state.get(STRATEGY_KEY))
+
+def load_sync_state(dest_base: Path) -> dict[str, str]:
+    """
+    Returns the link targets written by the previous sync, keyed by path relative to dest_base.
+    Hard links cannot be told apart from regular files, so they are recognized from here.
+    """
+    state_file = Path(dest_base) / SYNC_STATE_FILE
+    if state_file.exists():
+        try:
+            with state_file.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            pass
+    return {}
+
+def read_tree(dest_base: Path, roots: list[str], state: dict[str, str]) -> tuple[dict[Path, str | None], set[Path]]:
+    """
+    Reads the links and directories currently under the given category roots: symlinks,
+    .lnk shortcuts and hard links written by an earlier sync. Other regular files are
+    left out, so they are never touched.
+
+    Returns:
+    tuple: ({relative link path: absolute target, or None if unknown}, {relative directory paths})
+    """
+    dest_base = Path(dest_base)
+    links = {}
+    dirs = set()
+    for root in roots:
+        for directory, subdirs, files in os.walk(dest_base / root):
+            rel_dir = Path(directory).relative_to(dest_base)
+            dirs.add(rel_dir)
+            for name in files + [d for d in subdirs if os.path.islink(os.path.join(directory, d))]:
+                path = os.path.join(directory, name)
+                rel = rel_dir / name
+                known = state.get(rel.as_posix())
+                if os.path.islink(path):
+                    links[rel] = os.path.join(directory, os.readlink(path))
+                elif name.endswith(LINK_SUFFIX):
+                    try:
+                        links[rel] = read_lnk(path)
+                    except (LnkError, OSError):
+                        if known:  # ours, e.g. written through the shell; other shortcuts are left alone
+                            links[rel] = known
+                elif known:
+                    try:
+                        links[rel] = known if os.path.samefile(path, known) else None
+                    except OSError:
+                        links[rel] = None
+    return links, dirs
+
+def plan_sync(dest_base: Path, roots: list[str], desired: dict[Path, Path], strategy: str | None = None) -> list[SyncOp]:
+    """
+    Compares the desired category tree with what is on disk under the given roots.
+
+    Parameters:
+    dest_base (Path): The categorized folder.
+    roots (list[str]): The category folders being synced (e.g. "ByDirector").
+    desired (dict[Path, Path]): Link path relative to dest_base -> movie file it should point to.
+    strategy (str | None): Link strategy; every link under a root last synced with another
+        strategy is rewritten.
+
+    Returns:
+    list[SyncOp]: The changes needed, in the order they have to be applied.
+    """
+    state = load_sync_state(dest_base)
+    links, dirs = read_tree(dest_base, roots, state)
+    if strategy:
+        changed = {root for root in roots if root_strategy(state, root) not in (None, strategy)}
+        links = {path: None if path.parts[0] in changed else target for path, target in links.items()}
+    wanted_dirs = {Path(root) for root in roots}
+    for path in desired:
+        wanted_dirs.update(parent for parent in path.parents if parent != Path("."))
+
+    ops = []
+    for path, target in links.items():
+        if path not in desired:
+            ops.append(SyncOp("remove", path))
+    for path in sorted(dirs - wanted_dirs, key=lambda p: len(p.parts), reverse=True):
+        ops.append(SyncOp("rmdir", path))
+    for path in sorted(wanted_dirs - dirs, key=lambda p: len(p.parts)):
+        ops.append(SyncOp("mkdir", path))
+    for path, target in desired.items():
+        if path not in links:
+            ops.append(SyncOp("create", path, target))
+        elif not _same_target(links[path], target):
+            ops.append(SyncOp("retarget", path, target))
+    return ops
+
+def apply_sync(dest_base: Path, ops: list[SyncOp], writer: LinkWriter, strategy: str | None = None) -> list[SyncOp]:
+    """
+    Applies the changes from plan_sync and records the resulting link targets.
+    Directory changes and removals are applied first, in order; the links are then
+    written in parallel by writer, one category root at a time. strategy is recorded for
+    every root whose links were all written.
+    Directories that still contain foreign files are kept.
+
+    Returns:
+    list[SyncOp]: The changes that were applied.
+    """
+    dest_base = Path(dest_base)
+    state = load_sync_state(dest_base)
+    applied = []
+    link_ops = {}
+    for op in ops:
+        path = dest_base / op.path
+        try:
+            if op.kind == "remove":
+                path.unlink()
+                state.pop(op.path.as_posix(), None)
+            elif op.kind == "rmdir":
+                if any(path.iterdir()):
+                    continue  # still holds files that are not ours
+                path.rmdir()
+            elif op.kind == "mkdir":
+                path.mkdir(parents=True, exist_ok=True)
+            else:
+                link_ops.setdefault(op.path.parts[0], []).append(op)
+                continue
+        except OSError as e:
+            print(f"Could not {op.kind} {path}: {e}")
+            continue
+        applied.append(op)
+
+    for root, root_ops in link_ops.items():
+        errors = writer.write([(op.target, dest_base / op.path, op.kind == "retarget") for op in root_ops], root)
+        for op, error in zip(root_ops, errors):
+            if error:
+                print(f"Could not {op.kind} {dest_base / op.path}: {error}")
+                continue
+            state[op.path.as_posix()] = str(op.target)
+            applied.append(op)
+        if strategy and not any(errors):
+            state[_strategy_key(root)] = strategy
+    write_json_atomic(dest_base / SYNC_STATE_FILE, state, indent=None)
+    return applied
+
+def _exchange(a: Path, b: Path) -> bool:
+    """
+    Atomically swaps two directories with renameat2(RENAME_EXCHANGE) on Linux.
+    Returns False where that is not available, so the caller falls back to two renames.
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+    renameat2 = getattr(ctypes.CDLL(None, use_errno=True), "renameat2", None)
+    if renameat2 is None:
+        return False
+    at_fdcwd, rename_exchange = -100, 2
+    if renameat2(at_fdcwd, os.fsencode(a), at_fdcwd, os.fsencode(b), rename_exchange) == 0:
+        return True
+    errno = ctypes.get_errno()
+    if errno in (22, 38, 95):  # EINVAL, ENOSYS, EOPNOTSUPP: not supported by this file system
+        return False
+    raise OSError(errno, os.strerror(errno), str(a))
+
+def swap_in(staged: Path, live: Path, trash: Path) -> None:
+    """
+    Replaces the directory live with staged. Readers see either the old or the new tree:
+    on Linux the two are exchanged in one step; elsewhere the old tree is renamed away and
+    the new one renamed in right after. The old tree ends up at trash.
+    """
+    if not live.exists():
+        staged.rename(live)
+    elif _exchange(staged, live):
+        staged.rename(trash)
+    else:
+        live.rename(trash)
+        try:
+            staged.rename(live)
+        except OSError:
+            trash.rename(live)
+            raise
+
+def _copy_foreign_files(dest_base: Path, root: str, links: dict[Path, str | None], staging: Path) -> None:
+    # Files under a category root that we did not write are carried over to the new tree
+    for directory, _, files in os.walk(dest_base / root):
+        rel_dir = Path(directory).relative_to(dest_base)
+        for name in files:
+            rel = rel_dir / name
+            if rel in links or os.path.islink(os.path.join(directory, name)):
+                continue
+            copy = staging / rel.relative_to(root)
+            copy.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(dest_base / rel, copy)
+            except OSError:
+                shutil.copy2(dest_base / rel, copy)
+
+def _empty_trash(trash_dir: Path) -> threading.Thread:
+    def remove():
+        for path in list(trash_dir.iterdir()):
+            shutil.rmtree(path, ignore_errors=True)
+    thread = threading.Thread(target=remove, name="cinemashelf-trash")
+    thread.start()
+    return thread
+
+def apply_staged(dest_base: Path, ops: list[SyncOp], desired: dict[Path, Path], writer: LinkWriter,
+                 strategy: str | None = None) -> list[SyncOp]:
+    """
+    Applies the changes from plan_sync without touching the live tree: every category
+    root with changes is built from scratch in a staging directory next to it and then
+    swapped in, so readers never see a half-built category. Roots without changes are
+    left alone. Replaced trees, and leftovers of interrupted runs, are removed by a
+    background thread.
+
+    Parameters:
+    dest_base (Path): The categorized folder.
+    ops (list[SyncOp]): The changes from plan_sync.
+    desired (dict[Path, Path]): The desired tree that was passed to plan_sync.
+    writer (LinkWriter): Writes the links of each staged root.
+    strategy (str | None): Link strategy, recorded for every root that was swapped in.
+
+    Returns:
+    list[SyncOp]: The changes that were applied.
+    """
+    dest_base = Path(dest_base)
+    trash_dir = dest_base / TRASH_DIR
+    trash_dir.mkdir(parents=True, exist_ok=True)
+    for leftover in dest_base.glob(STAGING_PREFIX + "*"):
+        leftover.rename(trash_dir / leftover.name)
+
+    state = load_sync_state(dest_base)
+    roots = list(dict.fromkeys(op.path.parts[0] for op in ops))
+    applied = []
+    for root in roots:
+        # Staged next to the live root, at the same depth, so relative links stay valid after the swap
+        token = uuid.uuid4().hex[:8]
+        staging = dest_base / f"{STAGING_PREFIX}{root}.{token}"
+        entries = [(path, target) for path, target in desired.items() if path.parts[0] == root]
+        staging.mkdir()
+        for path, _ in entries:
+            (staging / path.parent.relative_to(root)).mkdir(parents=True, exist_ok=True)
+        errors = writer.write([(target, staging / path.relative_to(root), False) for path, target in entries], root)
+        failed = set()
+        for (path, _), error in zip(entries, errors):
+            if error:
+                print(f"Could not create {dest_base / path}: {error}")
+                failed.add(path)
+        try:
+            if (dest_base / root).exists():
+                links, _ = read_tree(dest_base, [root], state)
+                _copy_foreign_files(dest_base, root, links, staging)
+            swap_in(staging, dest_base / root, trash_dir / f"{root}.{token}")
+        except OSError as e:
+            print(f"Could not swap in {dest_base / root}: {e}")
+            staging.rename(trash_dir / staging.name)
+            continue
+
+        prefix = root + "/"
+        state = {key: value for key, value in state.items() if not key.startswith(prefix)}
+        state.update((path.as_posix(), str(target)) for path, target in entries if path not in failed)
+        if strategy:
+            state[_strategy_key(root)] = strategy
+        write_json_atomic(dest_base / SYNC_STATE_FILE, state, indent=None)
+        applied.extend(op for op in ops if op.path.parts[0] == root and op.path not in failed)
+
+    write_json_atomic(dest_base / SYNC_STATE_FILE, state, indent=None)
+    _empty_trash(trash_dir)
+    return applied
@@ -1,5 +1,10 @@
+import json
+import os
 import re
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator
 
 def sanitize_folder_name(name: str) -> str:
     """
@@ -12,6 +17,7 @@ def parse_movie_filename(file_name: str) -> tuple[str, str]:
     """
     Extracts the movie title and year from the file name.
     The algorithm considers the part before the first occurrence of a 4-digit year as the title.
+    An opening bracket left in front of the year ("Title (2010)") is dropped with it.
     """
     base = Path(file_name).stem
     # Replace underscores and dots with spaces for easier matching.
@@ -19,13 +25,33 @@ def parse_movie_filename(file_name: str) -> tuple[str, str]:
     match = re.search(r'(18|19|20)\d{2}', normalized)
     if match:
         year = match.group(0)
-        title = normalized[:match.start()].strip(' .-')
+        title = normalized[:match.start()].rstrip(' .-([{').strip(' .-')
     else:
         year = ""
         title = normalized
 
     return title, year
 
+RELEASE_TAG_PATTERN = re.compile(
+    r'\b(?:480p|576p|720p|1080p|2160p|4k|uhd|hdr|hdr10|10bit|bluray|blu ray|brrip|bdrip|remux|'
+    r'webrip|web dl|webdl|web|hdrip|dvdrip|dvdscr|hdtv|x264|x265|h264|h265|hevc|xvid|divx|'
+    r'aac|ac3|dts|atmos|proper|repack|extended|unrated|remastered|imax)\b',
+    re.IGNORECASE)
+
+def strip_release_tags(title: str) -> str:
+    """
+    Removes scene release junk (resolution, source, codec, ...) from a parsed title by
+    cutting it at the first release tag, and drops bracketed groups, unmatched brackets
+    and trailing punctuation.
+    Returns the title unchanged if nothing would be left.
+    """
+    cleaned = re.sub(r'[\[(].*?[\])]', ' ', title)
+    cleaned = re.sub(r'[\[\](){}]', ' ', cleaned).replace('-', ' ')
+    match = RELEASE_TAG_PATTERN.search(cleaned)
+    if match:
+        cleaned = cleaned[:match.start()]
+    return ' '.join(cleaned.split()).rstrip(' .,:;') or title
+
 def extract_year(year_str: str) -> int | None:
     """
     Extract the first 4-digit year from a string.
@@ -34,3 +60,134 @@ def extract_year(year_str: str) -> int | None:
     if match:
         return int(match.group(0))
     return None
+
+@contextmanager
+def open_atomic(path: Path, mode: str = "wb", **kwargs) -> Iterator:
+    """
+    Opens a temporary file in the same directory as path for writing; once the block
+    completes, the file is synced to disk and replaces path, so readers never see a
+    half-written file. If the block fails, the temporary file is removed and path is left
+    as it was. mode and kwargs are passed to open.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+def write_bytes_atomic(path: Path, data: bytes) -> None:
+    """
+    Writes data to path atomically (see open_atomic).
+    """
+    with open_atomic(path) as f:
+        f.write(data)
+
+def write_json_atomic(path: Path, data, indent: int | None = 4) -> None:
+    """
+    Writes data as JSON (UTF-8) to path atomically (see open_atomic).
+    """
+    write_bytes_atomic(path, json.dumps(data, ensure_ascii=False, indent=indent).encode("utf-8"))
+
+def write_text_atomic(path: Path, text: str) -> None:
+    """
+    Writes text (UTF-8) to path atomically, like write_json_atomic.
+    """
+    write_bytes_atomic(path, text.encode("utf-8"))
+
+JSON_READ_CHUNK = 64 * 1024
+JSON_SCALAR_END = re.compile(r'[\s,\]]')  # what may follow a number or literal in an array
+
+def iter_json_array(path: Path, chunk_size: int = JSON_READ_CHUNK) -> Iterator:
+    """
+    Lazily yields the items of a JSON file whose top level is an array, decoding one
+    item at a time from a bounded read buffer instead of loading the whole document.
+    Memory use depends on the size of the largest item, not on the size of the file.
+
+    Raises:
+    json.JSONDecodeError: If the file is not a well-formed JSON array.
+    """
+    decoder = json.JSONDecoder()
+    with Path(path).open("r", encoding="utf-8") as f:
+        buffer = f.read(chunk_size)
+        eof = not buffer
+        if buffer.startswith("\ufeff"):
+            buffer = buffer[1:]
+        pos = 0
+
+        def read_more() -> None:
+            # Drops what was consumed and appends the next chunk
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+
+        def peek() -> str:
+            # The next character that is not whitespace, or "" at the end of the file
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return buffer[pos:pos + 1]
+                read_more()
+
+        if peek() != "[":
+            raise json.JSONDecodeError("Expecting '['", buffer, pos)
+        pos += 1
+        if peek() != "]":
+            while True:
+                while True:
+                    try:
+                        item, end = decoder.raw_decode(buffer, pos)
+                    except json.JSONDecodeError:
+                        if eof:
+                            raise
+                        # The item continues past the buffer
+                        read_more()
+                        continue
+                    if not eof and not isinstance(item, (dict, list, str)) and \
+                            JSON_SCALAR_END.search(buffer, end) is None:
+                        # A number or literal might continue in the next chunk ("1." of "1.25")
+                        read_more()
+                        continue
+                    break
+                pos = end
+                yield item
+                separator = peek()
+                if separator == "]":
+                    break
+                if separator != ",":
+                    raise json.JSONDecodeError("Expecting ',' delimiter" if separator else "Unterminated array",
+                                               buffer, pos)
+                pos += 1
+                if peek() in ("]", ""):
+                    raise json.JSONDecodeError("Expecting value", buffer, pos)
+        pos += 1
+        if peek():
+            raise json.JSONDecodeError("Extra data", buffer, pos)
+
+def write_json_array_atomic(path: Path, items, indent: int = 4) -> int:
+    """
+    Like write_json_atomic for a top-level array, but encodes the items one at a time
+    from any iterable, so they never have to be in memory together.
+
+    Returns:
+    int: The number of items written.
+    """
+    count = 0
+    pad = " " * indent
+    with open_atomic(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for item in items:
+            encoded = json.dumps(item, ensure_ascii=False, indent=indent)
+            f.write(("," if count else "") + "\n" + pad + encoded.replace("\n", "\n" + pad))
+            count += 1
+        f.write("\n]" if count else "]")
+    return count